@@ -1,6 +1,7 @@
 # config/config_manager.py
 import os
 import yaml
+from typing import Any
 import streamlit as st
 import logging
 
@@ -18,7 +18,8 @@ from entertainment_tools.entertainment_tool import (
     entertainment_search_web, 
     entertainment_query_uploaded_docs, 
     entertainment_summarize_document_by_path,
-    entertainment_data_fetcher # The tool for fetching entertainment data
+    entertainment_data_fetcher, # The tool for fetching entertainment data
+    entertainment_data_fetcher_batch # Concurrent multi-fetch variant of entertainment_data_fetcher
 )
 
 # Import the RBAC-enabled Python interpreter tool
@@ -118,7 +119,8 @@ tools = [
     entertainment_search_web,
     entertainment_query_uploaded_docs,
     entertainment_summarize_document_by_path,
-    entertainment_data_fetcher # The tool for fetching entertainment data
+    entertainment_data_fetcher, # The tool for fetching entertainment data
+    entertainment_data_fetcher_batch
 ]
 
 # Conditionally add the Python interpreter based on user's tier
@@ -142,6 +144,7 @@ You have access to the following tools:
 - **`entertainment_query_uploaded_docs`**: Use this tool if the user's question seems to refer to specific entertainment documents or personal notes that might have been uploaded by them (e.g., "my movie watch list", "notes on a specific anime episode"). Always specify the `user_token` when calling this tool.
 - **`entertainment_summarize_document_by_path`**: Use this tool if the user explicitly asks you to summarize a document and provides a file path (e.g., "summarize the script for the new series at uploads/my_user/entertainment/script.pdf").
 - **`entertainment_data_fetcher`**: Use this tool to retrieve specific entertainment data (movies, series, music, anime details) from various entertainment APIs. Understand its parameters (`api_name`, `query`, `media_type`, `id`, `year`, `limit`).
+- **`entertainment_data_fetcher_batch`**: Use this tool instead of several `entertainment_data_fetcher` calls when one question needs multiple lookups (e.g., a movie's details and upcoming events). Pass a list of `specs`, each with the same keys as `entertainment_data_fetcher`; the lookups run concurrently.
 - **`python_interpreter_with_rbac`**: This is a powerful tool for users with appropriate tiers. Use it for:
     - **Parsing and Analyzing Fetched Data**: After using `entertainment_data_fetcher`, use this tool to parse the JSON output (e.g., `import json; data = json.loads(tool_output)`) and perform calculations, statistical analysis, or extract specific insights from entertainment datasets (e.g., analyzing movie ratings, box office numbers).
     - **Complex Queries**: Any query that requires programmatic logic, conditional statements, or data manipulation that cannot be directly answered by other tools.
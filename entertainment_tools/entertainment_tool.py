@@ -1,20 +1,27 @@
 # entertainment_tools/entertainment_tool.py
 
-import requests
+import os
 import json
-from typing import Optional, List, Dict, Any
+import orjson
+import asyncio
+import functools
+import hashlib
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple, Union, Callable, TYPE_CHECKING
 from pathlib import Path
+from urllib.parse import quote
 import logging
-import yaml # Added for loading entertainment_apis.yaml
+from cachetools import TLRUCache
 
 # Import generic tools
 from langchain_core.tools import tool
-from shared_tools.query_uploaded_docs_tool import QueryUploadedDocs
-from shared_tools.scraper_tool import scrape_web
-from shared_tools.doc_summarizer import summarize_document
-from shared_tools.import_utils import process_upload, clear_indexed_data # Used by Streamlit apps, not directly as agent tools
-from shared_tools.export_utils import export_response, export_vector_results # To be used internally by other tools, or for direct exports
-from shared_tools.vector_utils import build_vectorstore, load_docs_from_json_file, BASE_VECTOR_DIR # For testing and potential future direct use
+from shared_tools.json_stream_utils import LimitedItemsParser, limit_list
+# yaml, httpx, ijson and the shared_tools backends (scraper, vector store, summarizer) are
+# imported on first use, so agents that never call these tools don't pay for them at startup.
+
+if TYPE_CHECKING:
+    import httpx
 
 # REMOVED: from langchain_community.tools.python.tool import PythonREPLTool
 # The Python interpreter is now managed and imported via shared_tools/python_interpreter_tool.py
@@ -26,6 +33,7 @@ from config.config_manager import config_manager
 # Constants for the entertainment section
 ENTERTAINMENT_SECTION = "entertainment"
 DEFAULT_USER_TOKEN = "default" # Or use a proper user management if available
+_ENTERTAINMENT_APIS_PATH = os.path.join("data", "entertainment_apis.yaml")
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +51,8 @@ def entertainment_search_web(query: str, user_token: str = DEFAULT_USER_TOKEN, m
     Returns:
         str: A string containing relevant information from the web.
     """
-    logger.info(f"Tool: entertainment_search_web called with query: '{query}' for user: '{user_token}'")
+    logger.info("Tool: entertainment_search_web called with query: '%s' for user: '%s'", query, user_token)
+    from shared_tools.scraper_tool import scrape_web
     return scrape_web(query=query, user_token=user_token, max_chars=max_chars)
 
 @tool
@@ -62,7 +71,8 @@ def entertainment_query_uploaded_docs(query: str, user_token: str = DEFAULT_USER
         str: A string containing the combined content of the relevant document chunks,
              or a message indicating no data/results found, or the export path if exported.
     """
-    logger.info(f"Tool: entertainment_query_uploaded_docs called with query: '{query}' for user: '{user_token}'")
+    logger.info("Tool: entertainment_query_uploaded_docs called with query: '%s' for user: '%s'", query, user_token)
+    from shared_tools.query_uploaded_docs_tool import QueryUploadedDocs
     return QueryUploadedDocs(query=query, user_token=user_token, section=ENTERTAINMENT_SECTION, export=export, k=k)
 
 @tool
@@ -79,20 +89,21 @@ def entertainment_summarize_document_by_path(file_path_str: str) -> str:
     Returns:
         str: A concise summary of the document content.
     """
-    logger.info(f"Tool: entertainment_summarize_document_by_path called for file: '{file_path_str}'")
-    file_path = Path(file_path_str)
-    if not file_path.exists():
-        logger.error(f"Document not found at '{file_path_str}' for summarization.")
+    logger.info("Tool: entertainment_summarize_document_by_path called for file: '%s'", file_path_str)
+    if not os.path.isfile(file_path_str):
+        logger.error("Document not found at '%s' for summarization.", file_path_str)
         return f"Error: Document not found at '{file_path_str}'."
     
+    file_path = Path(file_path_str)
     try:
+        from shared_tools.doc_summarizer import summarize_document
         summary = summarize_document(file_path) # Assuming summarize_document can take Path object
         return f"Summary of '{file_path.name}':\n{summary}"
     except ValueError as e:
-        logger.error(f"Error summarizing document '{file_path_str}': {e}")
+        logger.error("Error summarizing document '%s': %s", file_path_str, e)
         return f"Error summarizing document: {e}"
     except Exception as e:
-        logger.critical(f"An unexpected error occurred during summarization of '{file_path_str}': {e}", exc_info=True)
+        logger.critical("An unexpected error occurred during summarization of '%s': %s", file_path_str, e, exc_info=True)
         return f"An unexpected error occurred during summarization: {e}"
 
 # === Advanced Entertainment Tools ===
@@ -104,19 +115,349 @@ def entertainment_summarize_document_by_path(file_path_str: str) -> str:
 # Helper to load API configs
 def _load_entertainment_apis() -> Dict[str, Any]:
     """Loads entertainment API configurations from data/entertainment_apis.yaml."""
-    entertainment_apis_path = Path("data/entertainment_apis.yaml")
-    if not entertainment_apis_path.exists():
-        logger.warning(f"data/entertainment_apis.yaml not found at {entertainment_apis_path}")
+    import yaml
+    if not os.path.exists(_ENTERTAINMENT_APIS_PATH):
+        logger.warning("data/entertainment_apis.yaml not found at %s", _ENTERTAINMENT_APIS_PATH)
         return {}
     try:
-        with open(entertainment_apis_path, "r") as f:
+        with open(_ENTERTAINMENT_APIS_PATH, "r") as f:
             full_config = yaml.safe_load(f) or {}
-            return {api['name']: api for api in full_config.get('apis', [])}
+        apis = {api['name']: api for api in full_config.get('apis', [])}
+        # Resolve secret references once here so the fetcher doesn't hit the secrets backend per call
+        for api in apis.values():
+            key_value = api.get("key_value")
+            if key_value and key_value.startswith("load_from_secrets."):
+                api["_resolved_key"] = config_manager.get_secret(key_value.removeprefix("load_from_secrets."))
+        return apis
     except Exception as e:
-        logger.error(f"Error loading entertainment_apis.yaml: {e}")
+        logger.error("Error loading entertainment_apis.yaml: %s", e)
         return {}
 
-ENTERTAINMENT_APIS_CONFIG = _load_entertainment_apis()
+@functools.cache
+def _entertainment_apis_config() -> Dict[str, Any]:
+    """Returns the entertainment API configurations, loading the YAML on first access."""
+    return _load_entertainment_apis()
+
+def _index_functions(apis_config: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Flattens each API's 'functions' section into {(api_name, FUNCTION_NAME): function_info}."""
+    return {
+        (api_name, function_name): function_info or {}
+        for api_name, api_info in apis_config.items()
+        for function_name, function_info in (api_info.get('functions') or {}).items()
+    }
+
+# Request builders receive (api_key, value of the required argument) and return (url, extra_params).
+RequestBuilder = Callable[[Optional[str], str], Tuple[str, Dict[str, Any]]]
+
+# data_type -> (FUNCTION name in the YAML, required tool argument, default list key of the response).
+# The list key names the list that `limit` applies to, as a dotted path for a nested one; a function
+# entry in the YAML can override it with `list_key`. Detail lookups return a single object and have none.
+_IMDB_ROUTES = {
+    "search_title": ("SEARCH_TITLE", "query", "results"),
+    "movie_details": ("MOVIE_DETAILS", "title", None),
+    "tv_show_details": ("TV_SHOW_DETAILS", "title", None),
+}
+_TICKETMASTER_ROUTES = {
+    "event_search": ("EVENT_SEARCH", "query", "_embedded.events"), # Discovery API: {"_embedded": {"events": [...]}, "page": ...}
+}
+
+def _build_request_dispatch(apis_config: Dict[str, Any], functions: Dict[Tuple[str, str], Dict[str, Any]]) -> Dict[Tuple[str, str], Tuple[str, RequestBuilder, Optional[str]]]:
+    """
+    Compiles the URL construction for every supported (api_name, data_type) once, at config-load time.
+    Returns {(api_name, data_type): (required_arg, builder, list_key)}; routes whose path is missing from the YAML are skipped.
+    """
+    dispatch = {}
+
+    imdb_endpoint = apis_config.get("IMDb", {}).get("endpoint")
+    for data_type, (function_name, required_arg, list_key) in _IMDB_ROUTES.items():
+        function_info = functions.get(("IMDb", function_name), {})
+        path = function_info.get("path")
+        if imdb_endpoint and path:
+            template = f"{imdb_endpoint}{{api_key}}/{path}/{{value}}"
+            # The query/title is a path segment, so escape it fully ('/', '?', '#', ...)
+            dispatch[("IMDb", data_type)] = (
+                required_arg,
+                lambda api_key, value, template=template: (template.format(api_key=api_key, value=quote(str(value), safe='')), {}),
+                function_info.get("list_key", list_key)
+            )
+
+    ticketmaster_info = apis_config.get("Ticketmaster", {})
+    for data_type, (function_name, required_arg, list_key) in _TICKETMASTER_ROUTES.items():
+        function_info = functions.get(("Ticketmaster", function_name), {})
+        path = function_info.get("path")
+        if ticketmaster_info.get("endpoint") and path:
+            url = f"{ticketmaster_info['endpoint']}{path}"
+            key_name = ticketmaster_info.get("key_name")
+            # Ticketmaster takes the API key ('apikey') as a query param
+            dispatch[("Ticketmaster", data_type)] = (
+                required_arg,
+                lambda api_key, value, url=url, key_name=key_name: (url, {"keyword": value, key_name: api_key}),
+                function_info.get("list_key", list_key)
+            )
+
+    return dispatch
+
+@functools.cache
+def _request_dispatch() -> Dict[Tuple[str, str], Tuple[str, RequestBuilder, Optional[str]]]:
+    """Returns the compiled request dispatch table, built from the API config on first access."""
+    apis_config = _entertainment_apis_config()
+    return _build_request_dispatch(apis_config, _index_functions(apis_config))
+
+def _http_limits() -> "httpx.Limits":
+    """Connection pool limits shared by the sync and batch clients."""
+    import httpx
+    return httpx.Limits(max_keepalive_connections=32)
+
+@functools.cache
+def _request_timeout() -> float:
+    """Returns the upstream request timeout, read from the config once instead of per call."""
+    return config_manager.get('web_scraping.timeout_seconds', 10)
+
+@functools.cache
+def _http_client() -> "httpx.Client":
+    """
+    Returns the shared HTTP client for all entertainment API calls, created on first use.
+    Reusing one client keeps connections alive between tool invocations (no TCP/TLS
+    handshake per call) and lets HTTP/2 multiplex concurrent requests to the same host.
+    The transport retries failed connection attempts; see `_send_with_retry` for status retries.
+    """
+    import httpx
+    return httpx.Client(
+        transport=httpx.HTTPTransport(http2=True, retries=_MAX_RETRIES, limits=_http_limits()),
+        timeout=_request_timeout()
+    )
+
+# Transient upstream statuses that are retried with exponential backoff
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRIES = 3
+_RETRY_BACKOFF_SECONDS = 0.2
+
+def _send_with_retry(client: "httpx.Client", request: Dict[str, Any], stream: bool = False) -> "httpx.Response":
+    """Sends the GET described by `request`, retrying transient statuses with exponential backoff."""
+    http_request = client.build_request("GET", request["url"], headers=request["headers"], params=request["params"], timeout=request["timeout"])
+    for attempt in range(_MAX_RETRIES + 1):
+        response = client.send(http_request, stream=stream)
+        if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+            return response
+        response.close()
+        time.sleep(_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+async def _asend_with_retry(client: "httpx.AsyncClient", request: Dict[str, Any], stream: bool = False) -> "httpx.Response":
+    """Async counterpart of `_send_with_retry`."""
+    http_request = client.build_request("GET", request["url"], headers=request["headers"], params=request["params"], timeout=request["timeout"])
+    for attempt in range(_MAX_RETRIES + 1):
+        response = await client.send(http_request, stream=stream)
+        if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+            return response
+        await response.aclose()
+        await asyncio.sleep(_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+# Response cache for entertainment API calls. Titles and events change slowly,
+# so repeat queries are served from memory instead of hitting the upstream API.
+# Lifetimes are per data_type (seconds); unknown data types use the default.
+_CACHE_TTLS = {
+    "search_title": 3600,
+    "movie_details": 86400,
+    "tv_show_details": 86400,
+    "event_search": 600,
+}
+_DEFAULT_CACHE_TTL = 3600
+
+def _cache_ttu(key: Tuple[str, str], value: str, now: float) -> float:
+    """Returns the expiry time for a cache entry based on its data_type."""
+    return now + _CACHE_TTLS.get(key[0], _DEFAULT_CACHE_TTL)
+
+_RESPONSE_CACHE = TLRUCache(maxsize=512, ttu=_cache_ttu)
+_RESPONSE_CACHE_LOCK = threading.Lock() # Streamlit serves sessions from multiple threads
+
+def _response_cache_key(api_name: str, data_type: str, params: Dict[str, Any]) -> Tuple[str, str]:
+    """Builds the cache key for a fetcher call: (data_type, blake2b digest of the call arguments)."""
+    digest = hashlib.blake2b(f"{api_name}|{data_type}|{sorted(params.items())}".encode(), digest_size=16).hexdigest()
+    return (data_type, digest)
+
+def _cache_get(cache_key: Tuple[str, str]) -> Optional[str]:
+    with _RESPONSE_CACHE_LOCK:
+        return _RESPONSE_CACHE.get(cache_key)
+
+def _cache_put(cache_key: Tuple[str, str], result: str) -> None:
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[cache_key] = result # Store the serialized result so hits skip re-serialization
+
+@functools.lru_cache(maxsize=128)
+def _validate_route(api_name: str, data_type: str) -> Tuple[bool, Optional[str]]:
+    """
+    Checks that (api_name, data_type) can be served with the current config.
+    Returns (True, None) or (False, error message). Results are cached, so an agent that keeps
+    retrying a wrong name gets the same answer without repeating the lookups and log writes.
+    """
+    api_info = _entertainment_apis_config().get(api_name)
+    if not api_info:
+        return False, f"Error: API '{api_name}' not found in data/entertainment_apis.yaml configuration."
+
+    api_key = api_info.get("_resolved_key")
+    if api_info.get("key_name") and not api_key:
+        logger.warning("API key for '%s' not found in secrets.toml. Proceeding without key if API allows.", api_name)
+
+    if api_name == "Spotify":
+        return True, None
+    if api_name not in ("IMDb", "Ticketmaster"):
+        return False, f"Error: API '{api_name}' is not supported by entertainment_data_fetcher."
+    if not api_key:
+        return False, f"Error: API key is required for {api_name} API."
+    if (api_name, data_type) not in _request_dispatch():
+        return False, f"Error: Unsupported data_type '{data_type}' for {api_name}."
+    return True, None
+
+def _build_entertainment_request(
+    api_name: str,
+    data_type: str,
+    query: Optional[str] = None,
+    title: Optional[str] = None,
+    artist_name: Optional[str] = None,
+    genre: Optional[str] = None,
+    year: Optional[int] = None,
+    limit: Optional[int] = None
+) -> Union[str, Dict[str, Any]]:
+    """
+    Resolves the API configuration and builds the HTTP request for a fetcher call.
+
+    Returns:
+        Union[str, Dict[str, Any]]: Either a final string to hand back to the agent (an error
+            message or mock payload), or a dict with the 'url', 'headers', 'params' and 'timeout'
+            of the request to send.
+    """
+    is_valid, error_message = _validate_route(api_name, data_type)
+    if not is_valid:
+        return error_message
+
+    api_info = _entertainment_apis_config()[api_name]
+    api_key = api_info.get("_resolved_key")
+    default_params = api_info.get("default_params", {})
+    headers = api_info.get("headers", {})
+    request_timeout = _request_timeout()
+
+    # --- Spotify (Placeholder - Requires OAuth 2.0, simplified for tool definition) ---
+    if api_name == "Spotify":
+        # Spotify requires an access token obtained via OAuth 2.0.
+        # This is a simplified placeholder. A real implementation would involve:
+        # 1. Client Credentials Flow to get an app access token.
+        # 2. Including the token in the Authorization header.
+        mock_data = {
+            "message": f"Mock data for Spotify {data_type} for query '{query or artist_name or title}'",
+            "details": "Actual Spotify integration requires OAuth 2.0 authentication.",
+            "api_name": api_name,
+            "data_type": data_type,
+            "query_params": {k: v for k, v in (("title", title), ("artist_name", artist_name), ("genre", genre), ("limit", limit)) if v is not None}
+        }
+        return orjson.dumps(mock_data).decode("utf-8")
+
+    # --- IMDb / Ticketmaster (Placeholders - URL construction is precompiled in _request_dispatch()) ---
+    required_arg, build_request, list_key = _request_dispatch()[(api_name, data_type)]
+    value = {"query": query, "title": title}[required_arg]
+    if not value: return f"Error: '{required_arg}' is required for {api_name} {data_type}."
+
+    url, extra_params = build_request(api_key, value)
+    if extra_params:
+        params = default_params.copy() # Only copy the defaults when this request adds to them
+        params.update(extra_params)
+    else:
+        params = default_params
+
+    return {
+        "url": url, "headers": headers, "params": params, "timeout": request_timeout,
+        "list_key": list_key
+    }
+
+def _format_entertainment_response(data: Any, limit: Optional[int], list_key: Optional[str]) -> str:
+    """Applies the record limit to a parsed API response and serializes it for the agent."""
+    # Apply limit if specified and data is a list (or has a list at the route's known list key)
+    if limit:
+        if list_key:
+            data = limit_list(data, list_key, limit)
+        if isinstance(data, list):
+            data = data[:limit]
+
+    # Compact output: the agent doesn't need indentation and it costs tokens downstream
+    return orjson.dumps(data).decode("utf-8")
+
+def _request_error_message(api_name: str, data_type: str, e: Exception) -> str:
+    """Logs a failed fetcher call and returns the error string handed back to the agent."""
+    import httpx
+    if isinstance(e, httpx.HTTPStatusError):
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, e)
+        logger.error("Response content: %s", e.response.text)
+        return f"API request failed for {api_name}: {e.response.text}"
+    if isinstance(e, httpx.HTTPError):
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, e)
+        return f"API request failed for {api_name}: {e}"
+    logger.error("Error processing %s response or request setup: %s", api_name, e, exc_info=True)
+    return f"An unexpected error occurred: {e}"
+
+class _InflightCall:
+    """A fetch in progress that concurrent identical calls wait on."""
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+
+_INFLIGHT_CALLS: Dict[Tuple[str, str], _InflightCall] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+def _single_flight(key: Tuple[str, str], fetch: Callable[[], str]) -> str:
+    """
+    Runs `fetch` for `key` unless an identical call is already in flight, in which case
+    waits for that call and returns its result instead of issuing a second request.
+    """
+    with _INFLIGHT_LOCK:
+        call = _INFLIGHT_CALLS.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _INFLIGHT_CALLS[key] = _InflightCall()
+
+    if not is_leader:
+        call.done.wait()
+        return call.result
+
+    try:
+        call.result = fetch()
+    finally:
+        with _INFLIGHT_LOCK:
+            del _INFLIGHT_CALLS[key]
+        call.done.set()
+    return call.result
+
+def _fetch_entertainment(api_name: str, data_type: str, call_args: Dict[str, Any], cache_key: Tuple[str, str]) -> str:
+    """Performs the upstream request for `entertainment_data_fetcher` and caches a successful result."""
+    try:
+        request = _build_entertainment_request(api_name, data_type, **call_args)
+        if isinstance(request, str):
+            return request
+
+        limit = call_args["limit"]
+        if limit and request["list_key"]:
+            # Stream the body and stop reading once `limit` items are parsed
+            parser = LimitedItemsParser(request["list_key"], limit)
+            response = _send_with_retry(_http_client(), request, stream=True)
+            try:
+                if response.is_error:
+                    response.read() # Load the error body so it can be reported
+                response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    if parser.feed(chunk):
+                        break
+            finally:
+                response.close()
+            result = orjson.dumps(parser.result()).decode("utf-8")
+        else:
+            response = _send_with_retry(_http_client(), request)
+            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+            result = _format_entertainment_response(orjson.loads(response.content), limit, request["list_key"])
+        _cache_put(cache_key, result)
+        return result
+
+    except Exception as e:
+        return _request_error_message(api_name, data_type, e)
 
 @tool
 def entertainment_data_fetcher(
@@ -144,110 +485,112 @@ def entertainment_data_fetcher(
         artist_name (str, optional): Music artist name (e.g., "Taylor Swift").
         genre (str, optional): Movie/Music genre (e.g., "Sci-Fi", "Pop").
         year (int, optional): Release year for movies/TV shows.
-        limit (int, optional): Maximum number of records to return.
+        limit (int, optional): Maximum number of records to return. For searches, the result is then
+                               only the list of records under its key (e.g. {"_embedded": {"events": [...]}}
+                               for Ticketmaster), without the response's other fields such as paging.
         
     Returns:
         str: A JSON string of the fetched data or an error message.
              The agent can then use `python_interpreter_with_rbac` to parse and analyze this JSON.
     """
-    logger.info(f"Tool: entertainment_data_fetcher called for API: {api_name}, data_type: {data_type}, query: {query}, title: {title}, artist: {artist_name}")
-
-    api_info = ENTERTAINMENT_APIS_CONFIG.get(api_name)
-    if not api_info:
-        return f"Error: API '{api_name}' not found in data/entertainment_apis.yaml configuration."
-
-    endpoint = api_info.get("endpoint")
-    key_name = api_info.get("key_name")
-    api_key_value_ref = api_info.get("key_value")
-    default_params = api_info.get("default_params", {})
-    headers = api_info.get("headers", {})
-    request_timeout = config_manager.get('web_scraping.timeout_seconds', 10)
-
-    api_key = None
-    if api_key_value_ref and api_key_value_ref.startswith("load_from_secrets."):
-        secret_key_path = api_key_value_ref.split("load_from_secrets.")[1]
-        api_key = config_manager.get_secret(secret_key_path)
-    
-    if key_name and not api_key:
-        logger.warning(f"API key for '{api_name}' not found in secrets.toml. Proceeding without key if API allows.")
-
-    params = {**default_params} # Start with default parameters
-    url = endpoint # Base URL, might be modified
+    logger.info("Tool: entertainment_data_fetcher called for API: %s, data_type: %s, query: %s, title: %s, artist: %s", api_name, data_type, query, title, artist_name)
+
+    call_args = {
+        "query": query, "title": title, "artist_name": artist_name,
+        "genre": genre, "year": year, "limit": limit
+    }
+    cache_key = _response_cache_key(api_name, data_type, call_args)
+    cached_result = _cache_get(cache_key)
+    if cached_result is not None:
+        logger.info("Cache hit for %s (%s).", api_name, data_type)
+        return cached_result
+
+    # Identical calls already in flight (e.g., from another session's thread) share one upstream request
+    return _single_flight(cache_key, lambda: _fetch_entertainment(api_name, data_type, call_args, cache_key))
+
+async def _fetch_one(client: "httpx.AsyncClient", spec: Dict[str, Any]) -> str:
+    """Async counterpart of `entertainment_data_fetcher` for a single batch spec."""
+    api_name = spec.get("api_name")
+    data_type = spec.get("data_type")
+    if not api_name or not data_type:
+        return "Error: each fetch spec requires 'api_name' and 'data_type'."
+
+    call_args = {name: spec.get(name) for name in ("query", "title", "artist_name", "genre", "year", "limit")}
+    cache_key = _response_cache_key(api_name, data_type, call_args)
+    cached_result = _cache_get(cache_key)
+    if cached_result is not None:
+        return cached_result
 
     try:
-        # --- IMDb (Placeholder - Actual IMDb API integration can be complex, often requiring OMDb or similar) ---
-        if api_name == "IMDb":
-            if not api_key: return "Error: API key is required for IMDb API."
-            
-            if data_type == "search_title":
-                if not query: return "Error: 'query' is required for IMDb search_title."
-                url = f"{endpoint}{api_key}/{api_info['functions']['SEARCH_TITLE']['path']}/{query}"
-            elif data_type == "movie_details":
-                if not title: return "Error: 'title' is required for IMDb movie_details."
-                url = f"{endpoint}{api_key}/{api_info['functions']['MOVIE_DETAILS']['path']}/{title}"
-            elif data_type == "tv_show_details":
-                if not title: return "Error: 'title' is required for IMDb tv_show_details."
-                url = f"{endpoint}{api_key}/{api_info['functions']['TV_SHOW_DETAILS']['path']}/{title}"
-            else:
-                return f"Error: Unsupported data_type '{data_type}' for IMDb."
-            
-            response = requests.get(url, headers=headers, params=params, timeout=request_timeout)
-
-        # --- Spotify (Placeholder - Requires OAuth 2.0, simplified for tool definition) ---
-        elif api_name == "Spotify":
-            # Spotify requires an access token obtained via OAuth 2.0.
-            # This is a simplified placeholder. A real implementation would involve:
-            # 1. Client Credentials Flow to get an app access token.
-            # 2. Including the token in the Authorization header.
-            mock_data = {
-                "message": f"Mock data for Spotify {data_type} for query '{query or artist_name or title}'",
-                "details": "Actual Spotify integration requires OAuth 2.0 authentication.",
-                "api_name": api_name,
-                "data_type": data_type,
-                "query_params": {k: v for k, v in locals().items() if v is not None and k in ['title', 'artist_name', 'genre', 'limit']}
-            }
-            return json.dumps(mock_data, ensure_ascii=False, indent=2)
-
-        # --- Ticketmaster (Placeholder - Requires specific API key and event search parameters) ---
-        elif api_name == "Ticketmaster":
-            if not api_key: return "Error: API key is required for Ticketmaster API."
-            if data_type == "event_search":
-                if not query: return "Error: 'query' is required for Ticketmaster event_search."
-                url = f"{endpoint}{api_info['functions']['EVENT_SEARCH']['path']}"
-                params['keyword'] = query
-                params[key_name] = api_key # Ticketmaster uses 'apikey' as a query param
-            else:
-                return f"Error: Unsupported data_type '{data_type}' for Ticketmaster."
-            
-            response = requests.get(url, headers=headers, params=params, timeout=request_timeout)
-
+        request = _build_entertainment_request(api_name, data_type, **call_args)
+        if isinstance(request, str):
+            return request
+
+        limit = call_args["limit"]
+        if limit and request["list_key"]:
+            parser = LimitedItemsParser(request["list_key"], limit)
+            response = await _asend_with_retry(client, request, stream=True)
+            try:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    if parser.feed(chunk):
+                        break
+            finally:
+                await response.aclose()
+            result = orjson.dumps(parser.result()).decode("utf-8")
         else:
-            return f"Error: API '{api_name}' is not supported by entertainment_data_fetcher."
+            response = await _asend_with_retry(client, request)
+            response.raise_for_status()
+            result = _format_entertainment_response(orjson.loads(response.content), limit, request["list_key"])
+        _cache_put(cache_key, result)
+        return result
 
-        response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-        data = response.json()
-        
-        # Apply limit if specified and data is a list (or has a list-like key)
-        if limit and isinstance(data, dict):
-            # Common keys for lists in entertainment APIs
-            for key in ['results', 'Search', 'tracks', 'artists', 'albums', 'events']:
-                if key in data and isinstance(data[key], list):
-                    data[key] = data[key][:limit]
-                    break
-        elif limit and isinstance(data, list):
-            data = data[:limit]
+    except Exception as e:
+        return _request_error_message(api_name, data_type, e)
+
+async def _gather_entertainment_fetches(specs: List[Dict[str, Any]]) -> List[str]:
+    # An AsyncClient is bound to the event loop it runs on, and asyncio.run() creates a
+    # fresh loop per batch, so the client is scoped to the batch rather than the module.
+    import httpx
+    transport = httpx.AsyncHTTPTransport(http2=True, retries=_MAX_RETRIES, limits=_http_limits())
+    async with httpx.AsyncClient(transport=transport) as client:
+        # Identical specs within a batch share a single request
+        tasks: Dict[bytes, asyncio.Future] = {}
+        ordered = []
+        for spec in specs:
+            spec_key = orjson.dumps(spec, option=orjson.OPT_SORT_KEYS)
+            if spec_key not in tasks:
+                tasks[spec_key] = asyncio.ensure_future(_fetch_one(client, spec))
+            ordered.append(tasks[spec_key])
+        return await asyncio.gather(*ordered)
 
-        return json.dumps(data, ensure_ascii=False, indent=2)
+@tool
+def entertainment_data_fetcher_batch(specs: List[Dict[str, Any]]) -> str:
+    """
+    Fetches several entertainment API results concurrently in a single call.
+    Use this instead of calling `entertainment_data_fetcher` repeatedly when one question
+    needs data from several lookups (e.g., a movie's details plus upcoming events).
+    
+    Args:
+        specs (List[Dict[str, Any]]): One dict per fetch, using the same keys as the
+            `entertainment_data_fetcher` arguments. 'api_name' and 'data_type' are required.
+            Example: [{"api_name": "IMDb", "data_type": "search_title", "query": "Dune"},
+                      {"api_name": "Ticketmaster", "data_type": "event_search", "query": "Dune"}]
+    
+    Returns:
+        str: The result of each fetch (a JSON string or an error message), in the order given.
+    """
+    logger.info("Tool: entertainment_data_fetcher_batch called with %s fetch specs.", len(specs))
+    if not specs:
+        return "Error: 'specs' must contain at least one fetch request."
 
-    except requests.exceptions.RequestException as req_e:
-        logger.error(f"API request failed for {api_name} ({data_type}): {req_e}")
-        if hasattr(req_e, 'response') and req_e.response is not None:
-            logger.error(f"Response content: {req_e.response.text}")
-            return f"API request failed for {api_name}: {req_e.response.text}"
-        return f"API request failed for {api_name}: {req_e}"
-    except Exception as e:
-        logger.error(f"Error processing {api_name} response or request setup: {e}", exc_info=True)
-        return f"An unexpected error occurred: {e}"
+    results = asyncio.run(_gather_entertainment_fetches(specs))
+    return "\n\n".join(
+        f"Result {i} ({spec.get('api_name')} / {spec.get('data_type')}):\n{result}"
+        for i, (spec, result) in enumerate(zip(specs, results), start=1)
+    )
 
 
 # CLI Test (optional)
@@ -255,8 +598,7 @@ if __name__ == "__main__":
     import streamlit as st
     import shutil
     import os
-    from config.config_manager import ConfigManager # Import ConfigManager for testing setup
-    from shared_tools.llm_embedding_utils import get_llm # For testing summarization with a real LLM
+    from shared_tools.vector_utils import BASE_VECTOR_DIR
     # Import the RBAC-enabled Python interpreter tool for testing purposes here
     from shared_tools.python_interpreter_tool import python_interpreter_with_rbac
     from unittest.mock import MagicMock
@@ -477,8 +819,10 @@ search_apis:
     # Re-load config after creating dummy file
     sys.modules['config.config_manager'].config_manager = MockConfigManager()
     sys.modules['config.config_manager'].ConfigManager = MockConfigManager # Also replace the class for singleton check
-    global ENTERTAINMENT_APIS_CONFIG
-    ENTERTAINMENT_APIS_CONFIG = _load_entertainment_apis()
+    _entertainment_apis_config.cache_clear()
+    _request_dispatch.cache_clear()
+    _request_timeout.cache_clear()
+    _validate_route.cache_clear()
     print("Dummy entertainment_apis.yaml created and config reloaded for testing.")
 
 
@@ -489,24 +833,29 @@ search_apis:
         search_result = entertainment_search_web(search_query, user_token=test_user)
         print(f"Search Result for '{search_query}':\n{search_result[:500]}...")
 
-        # Mock requests.get for API calls
+        # Mock the shared HTTP client for API calls
         class MockResponse:
             def __init__(self, json_data, status_code=200):
                 self._json_data = json_data
                 self.status_code = status_code
                 self.text = json.dumps(json_data)
+                self.content = self.text.encode("utf-8")
+                self.is_error = status_code >= 400
             def json(self):
                 return self._json_data
             def raise_for_status(self):
                 if self.status_code >= 400:
-                    raise requests.exceptions.HTTPError(f"HTTP Error: {self.status_code}", response=self)
+                    raise httpx.HTTPStatusError(f"HTTP Error: {self.status_code}", request=None, response=self)
+            def close(self):
+                pass
 
-        original_requests_get = requests.get
-        requests.get = MagicMock(side_effect=[
+        http_client = _http_client()
+        original_http_send = http_client.send
+        http_client.send = MagicMock(side_effect=[
             MockResponse({"results": [{"title": "Dune: Part Two", "year": "2024"}]}),
             MockResponse({"title": "Inception", "director": "Christopher Nolan"}),
             MockResponse({"title": "Game of Thrones", "seasons": 8}),
-            MockResponse({"events": [{"name": "Taylor Swift Concert", "venue": "Stadium", "date": "2025-07-15"}]})
+            MockResponse({"_embedded": {"events": [{"name": "Taylor Swift Concert", "venue": "Stadium", "date": "2025-07-15"}]}})
         ])
 
         # Test entertainment_data_fetcher - IMDb
@@ -528,8 +877,8 @@ search_apis:
         ticketmaster_events = entertainment_data_fetcher(api_name="Ticketmaster", data_type="event_search", query="Taylor Swift")
         print(f"Ticketmaster Events 'Taylor Swift': {ticketmaster_events}")
         
-        # Restore original requests.get
-        requests.get = original_requests_get
+        # Restore original HTTP client method
+        http_client.send = original_http_send
 
         # Test python_interpreter_with_rbac with mock data (example)
         print("\n--- Testing python_interpreter_with_rbac with mock data ---")
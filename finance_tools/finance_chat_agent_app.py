@@ -1,31 +1,41 @@
 # ui/finance_chat_agent_app.py
 
 import streamlit as st
-from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain_core.prompts import PromptTemplate
+from langchain_core.tools import render_text_description
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain_core.callbacks import StreamingStdOutCallbackHandler
 import logging
+import queue
+import threading
+from collections import deque
+from typing import Iterator, Optional, Tuple
 
 # Assume config_manager and get_user_token exist in these paths
 from config.config_manager import config_manager
-from utils.user_manager import get_current_user, get_user_tier_capability # For getting user token and capabilities
-from shared_tools.llm_embedding_utils import get_llm # For getting the LLM instance
+from utils.user_manager import get_session_user, get_user_tier_capability # For getting user token and capabilities
+from shared_tools.llm_embedding_utils import get_llm, install_llm_cache # For getting the LLM instance and caching its responses
+from shared_tools.agent_utils import FinalAnswerStreamHandler, ToolTraceHandler # Answer streaming; per-session tool trace
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
 # Import the finance-specific tools
 from finance_tools.finance_tool import (
-    finance_search_web, 
-    finance_query_uploaded_docs, 
-    finance_summarize_document_by_path,
+    finance_docs, # Web search, uploaded-docs query and summarization as one tool
+    finance_search_web_batch, # Concurrent multi-query web search
+    finance_query_uploaded_docs_batch, # Batched multi-query search of the uploaded documents
     finance_data_fetcher, # The tool for fetching financial data
+    finance_data_fetcher_batch, # Concurrent multi-API variant of finance_data_fetcher
+    finance_timeseries_analyze, # Compiled rolling/returns/drawdown statistics on fetched prices
     stock_price_checker,
     crypto_price_checker,
     economic_indicator_checker
 )
 
 # Import the RBAC-enabled Python interpreter tool
-from shared_tools.python_interpreter_tool import python_interpreter_with_rbac
+from shared_tools.python_interpreter_tool import python_interpreter_with_rbac, prewarm_python_repl
+
+# Streamlit requires set_page_config to be the first Streamlit command of the script
+st.set_page_config(page_title="Finance AI Assistant", page_icon="📈", layout="centered")
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -57,7 +67,16 @@ def initialize_app_config():
             st.error(f"Failed to initialize configuration: {e}. Please ensure data/config.yml and .streamlit/secrets.toml are set up correctly.")
             st.stop()
 
-initialize_app_config()
+    # Repeated prompts (same text, model and temperature) are served from the LLM cache
+    install_llm_cache()
+
+@st.cache_resource # Process-wide setup only needs to run once, not on every rerun
+def _init_app() -> bool:
+    initialize_app_config()
+    prewarm_python_repl() # Build the interpreter and import pandas/numpy in the background
+    return True
+
+_init_app()
 
 # --- Streamlit UI for LLM Configuration ---
 st.sidebar.header("LLM Settings")
@@ -74,10 +93,11 @@ llm_temperature = st.sidebar.slider(
 
 # Get LLM based on configuration and user's temperature choice
 @st.cache_resource # Cache the LLM resource to avoid re-initializing on every rerun
-def get_llm_cached(temperature: float):
-    """Gets the appropriate LLM instance based on global config and provided temperature."""
+def get_llm_cached(temperature: float, model: Optional[str] = None):
+    """Gets the appropriate LLM instance based on global config, the provided temperature and optional model override."""
     # Call the centralized get_llm with the user-selected temperature
-    llm_instance = get_llm(override_temperature=temperature)
+    llm_instance = get_llm(override_temperature=temperature, model=model)
+    from langchain_openai import ChatOpenAI # Only needed for the compatibility check below
     
     # Ensure it's a ChatOpenAI for agent compatibility if that's the expectation
     # This check is a safeguard; ideally, the agent's prompt should be LLM-agnostic
@@ -85,17 +105,21 @@ def get_llm_cached(temperature: float):
     if not isinstance(llm_instance, ChatOpenAI):
         st.warning("The LangChain ReAct agent often performs best with OpenAI models. Ensure your chosen LLM is compatible.")
     
-    # Add streaming callbacks if the LLM supports it
-    # Note: Not all LLMs or LangChain integrations support streaming callbacks in the same way.
+    # Enable streaming if the LLM supports it; the output is rendered in the UI via st.write_stream.
     if hasattr(llm_instance, 'streaming'):
         llm_instance.streaming = True
-    if hasattr(llm_instance, 'callbacks'):
-        llm_instance.callbacks = [StreamingStdOutCallbackHandler()]
     
     return llm_instance
 
+# Optional cheaper model for the ReAct tool-selection steps; `llm` then writes the final answer of turns that called tools
+router_model = config_manager.get('llm.router_model')
+
+# Neighbouring slider values share one LLM instance (and so one agent executor)
+temperature_bucket = round(llm_temperature, 1)
+
 try:
-    llm = get_llm_cached(llm_temperature)
+    llm = get_llm_cached(temperature_bucket)
+    router_llm = get_llm_cached(temperature_bucket, router_model) if router_model else None
 except ValueError as e:
     st.error(e)
     st.stop()
@@ -105,7 +129,7 @@ except Exception as e:
 
 # --- Agent Setup ---
 # Get current user for RBAC checks
-current_user = get_current_user()
+current_user = get_session_user() # Cached per session; avoids a user lookup on every rerun
 user_token = current_user.get('user_id') # Use user_id as user_token for consistency with RBAC checks
 # If user_id is not available (e.g., mock user), fall back to a default or handle appropriately
 if not user_token:
@@ -113,10 +137,12 @@ if not user_token:
 
 # Define the base set of tools available to the Finance Agent
 tools = [
-    finance_search_web,
-    finance_query_uploaded_docs,
-    finance_summarize_document_by_path,
+    finance_docs,
+    finance_search_web_batch,
+    finance_query_uploaded_docs_batch,
     finance_data_fetcher, # The tool for fetching financial data
+    finance_data_fetcher_batch,
+    finance_timeseries_analyze,
     stock_price_checker,
     crypto_price_checker,
     economic_indicator_checker
@@ -139,20 +165,27 @@ You have access to the following tools:
 {tools}
 
 **Instructions for using tools:**
-- **`finance_search_web`**: Use this tool for general financial news, economic trends, or anything that requires up-to-date information from the broader internet on financial topics.
-- **`finance_query_uploaded_docs`**: Use this tool if the user's question seems to refer to specific financial documents, reports, or personal financial notes that might have been uploaded by them (e.g., "my investment portfolio details", "summary of the annual report I uploaded"). Always specify the `user_token` when calling this tool.
-- **`finance_summarize_document_by_path`**: Use this tool if the user explicitly asks you to summarize a document and provides a file path (e.g., "summarize the annual report at uploads/my_user/finance/report.pdf").
+- **`finance_docs`**: Use this tool for text-based finance information; choose the `op`:
+    - `op="search_web"` with a `query`: general financial news, economic trends, or anything that requires up-to-date information from the broader internet on financial topics.
+    - `op="query_docs"` with a `query`: the user's question seems to refer to specific financial documents, reports, or personal financial notes that might have been uploaded by them (e.g., "my investment portfolio details", "summary of the annual report I uploaded"). Always specify the `user_token` for this op.
+    - `op="summarize"` with a `file_path_str`: the user explicitly asks you to summarize a document and provides a file path (e.g., "summarize the annual report at uploads/my_user/finance/report.pdf").
+- **`finance_search_web_batch`**: Use this tool instead of several `finance_docs` web searches when one question needs multiple searches (e.g., recent news for each company being compared). Pass a list of `queries`; the searches run concurrently.
+- **`finance_query_uploaded_docs_batch`**: Use this tool instead of several `finance_docs` uploaded-document queries when a question breaks down into multiple sub-questions about the uploaded documents. Pass a list of `queries` and the `user_token`; the queries are searched together.
 - **`finance_data_fetcher`**: This is your primary tool for structured financial data from configured APIs.
-    - **For Stock Data**: Use `api_name="AlphaVantage"` or `api_name="FinancialModelingPrep"` with `data_type="stock_data"`. Provide `symbol` and `interval` (for historical).
+    - **For Stock Data**: Use `api_name="AlphaVantage"` or `api_name="FinancialModelingPrep"` with `data_type="stock_data"`. Provide `symbol` and `interval` (for historical). Pass multiple symbols as a comma-separated list in one call whenever comparing or aggregating (e.g., `symbol="AAPL,MSFT,GOOG"`); the result is keyed by symbol.
     - **For Crypto Data**: Use `api_name="CoinMarketCap"` or `api_name="CoinGecko"` with `data_type="crypto_data"`. Provide `symbol`.
     - **For Economic Indicators**: Use `api_name="AlphaVantage"` with `data_type="economic_indicator"`. Provide `indicator_type`.
     - Always specify the `api_name` and `data_type`, and then the relevant parameters for that specific API and data type.
-    - The output will be a JSON string. You will likely need to use `python_interpreter_with_rbac` to parse and analyze this JSON.
+    - The output will be a JSON string. To analyze it in `python_interpreter_with_rbac`, parse it with the preloaded `orjson.loads(...)` instead of `json.loads(...)`.
+    - For CoinGecko `crypto_market_chart`, pass `summarize=True` when an overview is enough (price range and change, return mean/std, maximum drawdown); the content is then a small summary instead of every price point.
+    - When you need the same kind of data for several symbols or coins, fetch them together in as few calls as possible (e.g., `ids="bitcoin,ethereum"` for CoinGecko) rather than one symbol at a time, and use `finance_data_fetcher_batch` for independent requests to different APIs instead of waiting on each result.
+- **`finance_data_fetcher_batch`**: Use this tool instead of several `finance_data_fetcher` calls when one question needs data from different APIs or data types (e.g., a stock quote plus an exchange rate). Pass `fetches`, a list of dicts each holding `api_name`, `data_type` and that request's parameters; the requests run concurrently, and their results are returned in the same order.
+- **`finance_timeseries_analyze`**: Use this tool for moving averages, volatility, z-scores, returns or maximum drawdown of a price series. Pass the JSON returned by `finance_data_fetcher` for a single symbol or coin (AlphaVantage `stock_prices` or CoinGecko `crypto_market_chart`) as `data_json`, the statistics as `ops`, and optionally a `window`. Prefer it over writing the same calculation in the Python interpreter.
 - **`stock_price_checker`**: Use this tool if the user asks for the current price of a specific stock.
 - **`crypto_price_checker`**: Use this tool if the user asks for the current price of a specific cryptocurrency.
 - **`economic_indicator_checker`**: Use this tool if the user asks for the latest value of a specific economic indicator.
 - **`python_interpreter_with_rbac`**: This is a powerful tool for users with appropriate tiers. Use it for:
-    - **Parsing and Analyzing Fetched Data**: After using `finance_data_fetcher`, use this tool to parse the JSON output (e.g., `import json; data = json.loads(tool_output)`) and perform calculations, statistical analysis, or extract specific insights from financial datasets (e.g., calculating moving averages, volatility, correlations).
+    - **Analyzing Fetched Data**: After using `finance_data_fetcher`, use this tool to parse its JSON output (e.g., `data = orjson.loads(tool_output)`) and perform calculations, statistical analysis, or extract specific insights from financial datasets (e.g., calculating moving averages, volatility, correlations).
     - **Complex Queries**: Any query that requires programmatic logic, conditional statements, or data manipulation that cannot be directly answered by other tools.
     - Print your final results or findings clearly to stdout so I can see them.
 
@@ -164,6 +197,17 @@ You have access to the following tools:
 - Cite your sources (e.g., "[From Web Search]", "[From Uploaded Docs]", "[Python Analysis]", "[From Alpha Vantage]") when you use a tool to retrieve information or perform analysis.
 - Maintain a professional, objective, and informative tone.
 
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
 Begin!
 
 {chat_history}
@@ -171,15 +215,216 @@ Question: {input}
 {agent_scratchpad}
 """
 
-prompt = PromptTemplate.from_template(template)
+@st.cache_resource # Parse the large template and render the tool descriptions once per tool set
+def build_prompt(_tools: list, tools_key: tuple) -> PromptTemplate:
+    """
+    Builds the ReAct prompt from the module-level template, with the `{tools}` and `{tool_names}`
+    blocks rendered up front as partial variables.
+
+    Args:
+        _tools (list): The tools available to the agent (not hashed by Streamlit).
+        tools_key (tuple): Names of the tools in `_tools`, used as the cache key.
+
+    Returns:
+        PromptTemplate: The prompt with the tool blocks filled in.
+    """
+    return PromptTemplate.from_template(template).partial(
+        tools=render_text_description(_tools),
+        tool_names=", ".join(tools_key)
+    )
+
+@st.cache_resource # Build the agent once per (model config, tool set) instead of on every rerun
+def build_agent_executor(_llm, _tools: list, model_key: tuple, tools_key: tuple) -> AgentExecutor:
+    """
+    Creates the ReAct agent and its executor.
+    The executor is shared by all sessions with the same model config and tool set: it holds no
+    per-session state (history and user_token are passed in on every run), and its runs are
+    thread-safe as long as the tools are.
+
+    Args:
+        _llm: The LLM instance (not hashed by Streamlit).
+        _tools (list): The tools available to the agent (not hashed by Streamlit).
+        model_key (tuple): (model name, temperature bucket) of `_llm`, used as part of the cache key.
+        tools_key (tuple): Names of the tools in `_tools`, used as part of the cache key.
+
+    Returns:
+        AgentExecutor: The executor wrapping the ReAct agent.
+    """
+    agent = create_react_agent(_llm, _tools, build_prompt(_tools, tools_key))
+    # Pass the user_token to the agent executor so it's available for tools
+    return AgentExecutor(
+        agent=agent,
+        tools=_tools,
+        verbose=config_manager.get('agent.verbose', False), # Full ReAct trace to stdout; debugging only
+        handle_parsing_errors=True
+    )
+
+# Prompt for the final answer when the ReAct steps run on the router model
+answer_template = """
+You are a highly specialized AI assistant focused on finance and economic data. Using the tool results gathered below, write the final answer to the user's question.
+Be concise and directly answer the question. Cite your sources (e.g., "[From Web Search]", "[From Uploaded Docs]", "[Python Analysis]", "[From Alpha Vantage]") for information taken from tool results. If the results do not answer the question, say so clearly and politely.
+
+{chat_history}
+Question: {input}
+
+Tool results:
+{observations}
+
+Draft answer:
+{draft}
+
+Final answer:
+"""
+
+# Per-observation cap when quoting tool results in the answer prompt
+MAX_OBSERVATION_CHARS = 4000
+
+def format_observations(steps: list) -> str:
+    """Formats the agent's (action, observation) steps for the answer prompt."""
+    if not steps:
+        return "(no tools were used)"
+    return "\n\n".join(
+        f"[{step.action.tool}] {step.action.tool_input}\n{str(step.observation)[:MAX_OBSERVATION_CHARS]}"
+        for step in steps
+    )
+
+def iter_agent_run(agent_executor: AgentExecutor, inputs: dict, callbacks: Optional[list] = None) -> Iterator[Tuple[str, object]]:
+    """
+    Runs the agent on a worker thread and yields, in the order they happen, ("token", text) for each
+    token of its final answer as the LLM writes it and ("chunk", chunk) for each chunk of
+    `agent_executor.stream` (steps and the final output). An error from the run is raised here.
+    """
+    events = queue.Queue()
+
+    def run():
+        answer_handler = FinalAnswerStreamHandler(lambda token: events.put(("token", token)))
+        try:
+            for chunk in agent_executor.stream(inputs, config={"callbacks": [*(callbacks or []), answer_handler]}):
+                events.put(("chunk", chunk))
+        except BaseException as e:
+            events.put(("error", e))
+        else:
+            events.put(("done", None))
+
+    worker = threading.Thread(target=run, daemon=True)
+    add_script_run_ctx(worker) # Tools keep access to the session's st.* state, as on the script thread
+    worker.start()
+    while True:
+        kind, value = events.get()
+        if kind == "done":
+            return
+        if kind == "error":
+            raise value
+        yield kind, value
+
+def stream_agent_output(agent_executor: AgentExecutor, inputs: dict, answer_llm=None, callbacks: Optional[list] = None):
+    """
+    Streams the agent run and yields the final answer token by token as it is written.
+    Without `answer_llm`, these are the tokens the agent's LLM writes after "Final Answer:"; if none
+    were streamed (e.g. the agent stopped at its iteration limit), the final output is yielded in one
+    piece when the run ends. The intermediate Thought/Action steps are not shown.
+    When `answer_llm` is given, the agent's steps ran on the router model. If they called tools, the
+    final answer is rewritten (and streamed token by token) by `answer_llm` from the gathered tool
+    results; a turn without tool calls keeps the router model's answer, streamed as above, instead of
+    paying for a second full LLM call.
+
+    Args:
+        agent_executor (AgentExecutor): The executor to run.
+        inputs (dict): The agent inputs (input, chat_history, user_token).
+        answer_llm: Optional LLM that writes the final answer after tool calls.
+        callbacks (list, optional): Callback handlers for this run only (the executor is shared across sessions).
+
+    Yields:
+        str: Chunks of the agent's final output.
+    """
+    steps = []
+    draft = ""
+    streamed = False
+    for kind, value in iter_agent_run(agent_executor, inputs, callbacks):
+        if kind == "token":
+            # A step's chunk arrives before the next LLM call starts, so `steps` is current here
+            if answer_llm is None or not steps:
+                streamed = True
+                yield value
+            continue
+        steps.extend(value.get("steps", []))
+        draft = value.get("output", draft)
+
+    if answer_llm is None or not steps:
+        if not streamed:
+            yield draft
+        return
+    answer_prompt = answer_template.format(
+        chat_history=inputs["chat_history"],
+        input=inputs["input"],
+        observations=format_observations(steps),
+        draft=draft
+    )
+    for token in answer_llm.stream(answer_prompt):
+        # Chat models stream message chunks; completion models (e.g. Ollama) stream plain strings
+        yield getattr(token, "content", token)
+
+def format_history_line(message) -> str:
+    """Formats a chat message as a transcript line for the agent's chat_history."""
+    return f"Human: {message.content}" if isinstance(message, HumanMessage) else f"AI: {message.content}"
+
+def append_to_history(message):
+    """Appends a message to the recent transcript lines kept in session state."""
+    st.session_state.recent_history.append(format_history_line(message))
+
+def build_chat_history() -> str:
+    """Builds the agent's chat_history from the running summary and the recent transcript lines."""
+    recent = "\n".join(st.session_state.recent_history)
+    if st.session_state.history_summary:
+        return f"Summary of earlier conversation:\n{st.session_state.history_summary}\n\nRecent:\n{recent}"
+    return recent
+
+# Prompt used to fold older turns into the running conversation summary
+summary_template = """
+Summarize the following finance conversation into at most 5 concise bullet points. Keep any symbols, figures, dates and user preferences that may matter for later questions.
+
+{existing_summary}
+{transcript}
+
+Summary:
+"""
+
+@st.cache_resource # The tokenizer is loaded once per process
+def get_token_encoding():
+    import tiktoken # Deferred: only needed once the history grows
+    return tiktoken.get_encoding("cl100k_base")
+
+def compact_history(summary_llm):
+    """
+    Keeps the prompt size bounded: once the recent transcript exceeds `agent.history_recent_messages`
+    lines or `agent.history_token_budget` tokens, the older lines are folded into the running summary
+    with a single LLM call and only the most recent lines are kept verbatim.
+
+    Args:
+        summary_llm: The LLM used to write the summary.
+    """
+    max_recent = config_manager.get('agent.history_recent_messages', 8)
+    token_budget = config_manager.get('agent.history_token_budget', 6000)
+    recent = st.session_state.recent_history
+
+    keep = max_recent
+    if len(recent) <= max_recent:
+        if len(get_token_encoding().encode("\n".join(recent))) <= token_budget:
+            return
+        keep = min(2, len(recent)) # Over the token budget: keep only the latest exchange verbatim
+    older, st.session_state.recent_history = recent[:-keep], recent[-keep:]
+    if not older:
+        return
 
-# Create the agent
-agent = create_react_agent(llm, tools, prompt)
-# Pass the user_token to the agent executor so it's available for tools
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, handle_parsing_errors=True)
+    existing_summary = f"Summary so far:\n{st.session_state.history_summary}\n" if st.session_state.history_summary else ""
+    try:
+        summary = summary_llm.invoke(summary_template.format(existing_summary=existing_summary, transcript="\n".join(older)))
+        st.session_state.history_summary = getattr(summary, "content", summary).strip()
+    except Exception as e:
+        # The older lines are dropped either way; the previous summary is kept as-is
+        logger.warning(f"Failed to summarize chat history: {e}")
 
 # --- Streamlit UI ---
-st.set_page_config(page_title="Finance AI Assistant", page_icon="📈", layout="centered")
 st.title("Finance AI Assistant 📈")
 st.markdown("Your dedicated AI for financial and economic insights. Ask me anything about markets, investments, and data analysis!")
 
@@ -189,49 +434,93 @@ if "messages" not in st.session_state:
         AIMessage(content="Hello! I am your Finance AI Assistant. How can I help you with your financial queries today?")
     ]
 
-# Display chat history
-for message in st.session_state.messages:
+# The agent's chat_history is a running summary of older turns plus the most recent lines verbatim,
+# so the prompt stays bounded as the conversation grows
+if "recent_history" not in st.session_state:
+    st.session_state.recent_history = [format_history_line(msg) for msg in st.session_state.messages]
+    st.session_state.history_summary = ""
+
+# Recent tool events of this session, recorded by ToolTraceHandler
+if "trace_events" not in st.session_state:
+    st.session_state.trace_events = deque(maxlen=200)
+
+# Display chat history, limited to the most recent messages so long chats stay cheap to rerender
+render_window = config_manager.get('ui.render_window', 50)
+hidden_count = len(st.session_state.messages) - render_window
+if hidden_count > 0:
+    st.caption(f"({hidden_count} earlier messages hidden)")
+for message in st.session_state.messages[-render_window:]:
     with st.chat_message("user" if isinstance(message, HumanMessage) else "assistant"):
         st.write(message.content)
 
-# Get user input
-user_query = st.chat_input("Ask me about finance...")
+# An error from the previous agent run, kept across the rerun that re-enables the chat input
+if "agent_error" in st.session_state:
+    st.error(st.session_state.pop("agent_error"))
+
+def mark_in_flight():
+    """Marks an agent run as in flight as soon as a message is submitted, before the rerun starts."""
+    st.session_state.in_flight = True
+
+# Get user input; disabled while a response is being generated so repeated submits can't start duplicate runs
+user_query = st.chat_input(
+    "Ask me about finance...",
+    disabled=st.session_state.get("in_flight", False),
+    on_submit=mark_in_flight
+)
 
 if user_query:
+    # Snapshot the transcript before this question; the question itself is passed as the agent's input
+    chat_history_str = build_chat_history()
     # Add user's query to chat history
     st.session_state.messages.append(HumanMessage(content=user_query))
+    append_to_history(st.session_state.messages[-1])
     with st.chat_message("user"):
         st.write(user_query)
 
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
             try:
-                # Get the current user token. This is important for tools like finance_query_uploaded_docs.
-                current_user_obj = get_current_user()
+                # Get the current user token. This is important for tools like finance_docs (op="query_docs").
+                current_user_obj = get_session_user()
                 current_user_token = current_user_obj.get('user_id') # Use user_id as token for RBAC checks
                 if not current_user_token:
                     st.warning("Could not retrieve user token. Functionality might be limited.")
                     current_user_token = "default" # Fallback for guest users or testing
 
-                # Prepare chat history for the agent.
-                chat_history_str = "\n".join([
-                    f"Human: {msg.content}" if isinstance(msg, HumanMessage) else f"AI: {msg.content}"
-                    for msg in st.session_state.messages[:-1] # Exclude the current human message
-                ])
+                # Tool-selection steps run on the router model when one is configured
+                agent_llm = router_llm or llm
+                agent_model = router_model or config_manager.get('llm.model')
+                agent_executor = build_agent_executor(agent_llm, tools, (agent_model, temperature_bucket), tuple(t.name for t in tools))
 
-                # Invoke the agent executor with the current input and chat history
-                response = agent_executor.invoke({
+                # Stream the agent run with the current input and chat history
+                ai_response = st.write_stream(stream_agent_output(agent_executor, {
                     "input": user_query,
                     "chat_history": chat_history_str,
                     "user_token": current_user_token # Pass user_token to the agent so tools can access it
-                })
-                
-                ai_response = response.get("output", "I could not process that request. Please try again.")
-                st.write(ai_response)
+                }, answer_llm=llm if router_llm else None, callbacks=[ToolTraceHandler(st.session_state.trace_events)]))
+                if not ai_response:
+                    ai_response = "I could not process that request. Please try again."
+                    st.write(ai_response)
                 st.session_state.messages.append(AIMessage(content=ai_response))
+                append_to_history(st.session_state.messages[-1])
+                # Summarize older turns after the answer is shown, using the cheaper model when configured
+                compact_history(router_llm or llm)
             except Exception as e:
-                st.error(f"An error occurred: {e}. Please try again or rephrase your question.")
+                st.session_state.agent_error = f"An error occurred: {e}. Please try again or rephrase your question."
                 logger.error(f"Agent execution failed: {e}", exc_info=True)
+            finally:
+                st.session_state.in_flight = False
+
+    # Rerun so the chat input is rendered enabled again now that the response has landed
+    st.rerun()
+
+# Tool trace, rendered only on request
+if st.toggle("Show tool trace", key="show_trace"):
+    with st.expander("Trace", expanded=True):
+        if not st.session_state.trace_events:
+            st.caption("No tool calls yet.")
+        for event in st.session_state.trace_events:
+            st.text(f"{event['event']:<10} {event['tool'] or ''}: {event['detail']}")
 
 st.markdown("---")
 st.caption(f"Current User Token: `{current_user.get('user_id', 'N/A')}` (for demo purposes)")
@@ -1,26 +1,21 @@
 # ui/finance_query_app.py
 
 import streamlit as st
+import asyncio
 import logging
-import json
-import pandas as pd
-from datetime import datetime, timedelta # For date inputs
+import orjson # Several times faster than the stdlib parser on large API payloads; finance_tool requires it too
 
 # Assume config_manager and get_user_token exist
 from config.config_manager import config_manager
-from utils.user_manager import get_current_user, get_user_tier_capability # Import get_current_user and get_user_tier_capability
-
-from finance_tools.finance_tool import (
-    finance_search_web, 
-    finance_data_fetcher,
-    stock_price_checker,
-    crypto_price_checker,
-    economic_indicator_checker
-)
+from utils.user_manager import get_session_user, get_session_capability # Per-session cached user and tier capability lookups
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# set_page_config must be the first Streamlit call, before any RBAC warning can be rendered
+st.set_page_config(page_title="Finance Query Tools", page_icon="📈", layout="centered")
+
 # --- Configuration Initialization ---
 def initialize_app_config():
     """
@@ -45,22 +40,33 @@ def initialize_app_config():
             st.error(f"Failed to initialize configuration: {e}. Please ensure data/config.yml and .streamlit/secrets.toml are set up correctly.")
             st.stop()
 
-initialize_app_config()
+@st.cache_resource # The config singleton only needs checking once per server process, not on every rerun
+def _get_config_manager():
+    initialize_app_config()
+    return config_manager
+
+_get_config_manager()
 
 # --- RBAC Access Check at the Top of the App ---
-current_user = get_current_user()
+current_user = get_session_user() # Cached per session; avoids a user lookup on every rerun
 user_tier = current_user.get('tier', 'free')
 user_roles = current_user.get('roles', [])
 
 # Define the required tier for this specific page (Finance Query Tools)
 # This should match the 'tier_access' defined in main_app.py for this page.
 REQUIRED_TIER_FOR_THIS_PAGE = "basic" 
+_ALLOWED_TIERS = frozenset({REQUIRED_TIER_FOR_THIS_PAGE, "pro", "elite", "premium"})
+_ADMIN_ROLES = frozenset({"admin"})
+
+def _can_access(tier: str, roles) -> bool:
+    """Returns True if the tier or roles grant access to this page."""
+    return bool(tier and roles) and (tier in _ALLOWED_TIERS or not _ADMIN_ROLES.isdisjoint(roles))
 
 # Check if user is logged in and has the required tier or admin role
 if not current_user:
     st.warning("⚠️ You must be logged in to access this page.")
     st.stop() # Halts execution
-elif not (user_tier and user_roles and (user_tier == REQUIRED_TIER_FOR_THIS_PAGE or user_tier in ["pro", "elite", "premium"] or "admin" in user_roles)):
+elif not _can_access(user_tier, user_roles):
     # This check is simplified. A more robust check would use the user_can_access_page function from main_app.
     # For now, we'll check if the user's tier is at or above the required tier, or if they are an admin.
     st.error(f"🚫 Access Denied: Your current tier ({user_tier.capitalize()}) does not have access to the Finance Query Tools. Please upgrade your plan to {REQUIRED_TIER_FOR_THIS_PAGE.capitalize()} or higher.")
@@ -68,10 +74,161 @@ elif not (user_tier and user_roles and (user_tier == REQUIRED_TIER_FOR_THIS_PAGE
 # --- End RBAC Access Check ---
 
 
+def _finance_tool():
+    """
+    Imports finance_tool on first use. It pulls in the HTTP clients, vector store and document
+    loaders, which pages that only render widgets (or are denied by RBAC) never need.
+    """
+    from finance_tools import finance_tool
+    return finance_tool
+
+
+# --- Cached Tool Calls ---
+# Identical requests within the TTL are served from Streamlit's cache instead of re-hitting the remote APIs.
+# Each cache is bounded by max_entries so a long-running server does not grow it without limit.
+# The user token does not affect the payload, so it is passed underscore-prefixed and left out of the cache key.
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False) # Web search results: 5 minutes
+def _cached_search(query: str, max_chars: int, _user_token: str) -> str:
+    return _finance_tool().finance_search_web.invoke({"query": query, "user_token": _user_token, "max_chars": max_chars})
+
+# Data types finance_data_fetcher supports, per API in data/finance_apis.yaml
+_DATA_TYPES = {
+    "AlphaVantage": ("stock_prices", "company_overview", "global_quote"),
+    "CoinGecko": ("crypto_price", "crypto_list", "crypto_market_chart"),
+    "ExchangeRate-API": ("exchange_rate_latest", "exchange_rate_convert"),
+}
+# The fetcher argument the form's symbol field maps to, for APIs that don't take a `symbol`
+_SYMBOL_ARGS = {"CoinGecko": "ids", "ExchangeRate-API": "base_currency"}
+
+def _fetch_financial_data(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit) -> str:
+    return _finance_tool().finance_data_fetcher.invoke({
+        "api_name": api_name,
+        "data_type": data_type,
+        _SYMBOL_ARGS.get(api_name, "symbol"): symbol,
+        "interval": interval,
+        "indicator_type": indicator_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "limit": limit
+    })
+
+@st.cache_data(ttl=60, max_entries=256, show_spinner=False) # Market data (quotes, prices): 1 minute
+def _cached_market_fetch(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit) -> str:
+    return _fetch_financial_data(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit)
+
+class _UncachedResult(Exception):
+    """Raised inside a cached fetch so that error messages are returned but never stored."""
+
+# AlphaVantage's daily series and company overviews change at most once a day (only its real-time
+# quote doesn't), so they are persisted to disk and survive server restarts. Disk-persisted caches
+# ignore `ttl`, so the day is part of the cache key instead and yesterday's entries simply stop being hit.
+_DAILY_DATA_TYPES = frozenset(_DATA_TYPES["AlphaVantage"]) - {"global_quote"}
+
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False)
+def _cached_daily_fetch(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit, as_of: str) -> str:
+    result = _fetch_financial_data(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit)
+    if not result.lstrip().startswith(("{", "[")):
+        raise _UncachedResult(result) # Don't pin an error message to disk for the rest of the day
+    return result
+
+def _cached_fetch(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit) -> str:
+    """Fetches financial data through the cache whose lifetime matches the volatility of `data_type`."""
+    is_intraday = bool(interval) and interval.endswith("min")
+    if data_type in _DAILY_DATA_TYPES and not is_intraday:
+        from datetime import date
+        try:
+            return _cached_daily_fetch(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit, as_of=date.today().isoformat())
+        except _UncachedResult as e:
+            return str(e)
+    return _cached_market_fetch(api_name, data_type, symbol, interval, indicator_type, start_date, end_date, limit)
+
+async def _multi_fetch(specs):
+    """Runs several finance_data_fetcher calls concurrently; total time is that of the slowest API."""
+    fetcher = _finance_tool().finance_data_fetcher
+    return await asyncio.gather(*(fetcher.ainvoke(spec) for spec in specs), return_exceptions=True)
+
+@st.cache_data(ttl=60, max_entries=256, show_spinner=False) # Market snapshot: 1 minute, like single market fetches
+def _cached_multi_fetch(specs: list) -> list:
+    return [r if isinstance(r, str) else f"An error occurred: {r}" for r in _finance_tool().run_async(_multi_fetch(specs))]
+
+# --- Cached DataFrame Builders ---
+# Streamlit reruns the whole script on every widget interaction; keying the parse + flatten on the
+# raw JSON string means each fetched payload is only turned into a DataFrame once.
+@st.cache_data(max_entries=64, show_spinner=False)
+def _av_daily_df(js: str):
+    """Builds a date-indexed float DataFrame from an AlphaVantage time series payload, or None."""
+    import pandas as pd # Deferred: pandas is only needed for tabular results and is slow to import
+    parsed_data = orjson.loads(js)
+    time_series_key = next((k for k in parsed_data if 'Time Series' in k), None) if isinstance(parsed_data, dict) else None
+    if not time_series_key:
+        return None
+    df = pd.DataFrame.from_dict(parsed_data[time_series_key], orient='index')
+    df.columns = [c.split(' ', 1)[-1] for c in df.columns] # "1. open" -> "open", once per column rather than per cell
+    df = df.astype(float)
+    df.index = pd.to_datetime(df.index)
+    df.index.name = 'Date'
+    return df
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cg_prices_df(js: str):
+    """Builds a timestamp-indexed DataFrame from a CoinGecko market_chart payload's 'prices', or None."""
+    import pandas as pd
+    parsed_data = orjson.loads(js)
+    if not isinstance(parsed_data, dict) or not parsed_data.get('prices'):
+        return None
+    import numpy as np
+    arr = np.asarray(parsed_data['prices'], dtype=np.float64) # One (N, 2) allocation instead of per-row objects
+    return pd.DataFrame(
+        {'Price': arr[:, 1]},
+        index=pd.DatetimeIndex(arr[:, 0].astype(np.int64).view('datetime64[ms]'), name='Timestamp') # Epoch ms: a cast, not a parse
+    )
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _exr_rates_df(js: str):
+    """Builds a currency-indexed DataFrame from an ExchangeRate-API payload's 'conversion_rates', or None."""
+    import pandas as pd
+    parsed_data = orjson.loads(js)
+    if not isinstance(parsed_data, dict) or not parsed_data.get('conversion_rates'):
+        return None
+    df = pd.Series(parsed_data['conversion_rates'], name='Rate', dtype=float).to_frame()
+    df.index.name = 'Currency'
+    return df
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _records_df(js: str):
+    """Builds a DataFrame from a JSON list of records, or None."""
+    import pandas as pd
+    parsed_data = orjson.loads(js)
+    if not isinstance(parsed_data, list) or not parsed_data:
+        return None
+    return pd.DataFrame.from_records(parsed_data)
+
+# Responses larger than this are shown as a truncated preview rather than an interactive JSON tree
+_MAX_JSON_TREE_CHARS = 100_000
+_JSON_PREVIEW_CHARS = 10_000
+
+def _limit_rows(df, limit):
+    """
+    Keeps at most `limit` rows before rendering, so st.dataframe serializes O(limit) rows rather
+    than e.g. 20 years of daily prices. Ascending time series keep their most recent rows.
+    """
+    if not limit or len(df) <= limit:
+        return df
+    is_ascending_series = getattr(df.index, "is_monotonic_increasing", False) and df.index.dtype.kind == "M"
+    return df.tail(limit) if is_ascending_series else df.head(limit)
+
+# The stock and crypto checkers share one UI: (kind, input label, placeholder, finance_tool function name)
+_PRICE_CHECKERS = {
+    "Stock Price Checker": ("Stock", "Enter stock symbol (e.g., AAPL, GOOGL):", "AAPL", "stock_price_checker"),
+    "Crypto Price Checker": ("Crypto", "Enter cryptocurrency symbol (e.g., BTC, ETH):", "BTC", "crypto_price_checker"),
+}
+
 # --- Streamlit UI ---
-st.set_page_config(page_title="Finance Query Tools", page_icon="📈", layout="centered")
 st.title("Finance Query Tools 📈")
 
+if st.sidebar.button("Clear cached results"):
+    st.cache_data.clear()
+
 st.markdown("Access various financial and economic tools directly.")
 
 user_token = current_user.get('user_id', 'default') # Get user token for personalization
@@ -90,17 +247,20 @@ tool_selection = st.selectbox(
 # --- Web Search ---
 if tool_selection == "Web Search (General Financial Info)":
     st.subheader("General Financial Web Search")
-    query = st.text_input("Enter your financial web query:", placeholder="e.g., 'impact of inflation on tech stocks', 'latest central bank policies'")
+    # A form batches the widget edits into a single rerun on submit
+    with st.form("web_search_form"):
+        query = st.text_input("Enter your financial web query:", placeholder="e.g., 'impact of inflation on tech stocks', 'latest central bank policies'")
     
-    # RBAC for max_chars in web search
-    allowed_max_chars = get_user_tier_capability(user_token, 'web_search_limit_chars', 2000)
-    max_chars = st.slider(f"Maximum characters in result snippet (Max for your tier: {allowed_max_chars}):", min_value=100, max_value=allowed_max_chars, value=min(1500, allowed_max_chars), step=100)
+        # RBAC for max_chars in web search
+        allowed_max_chars = get_session_capability(user_token, 'web_search_limit_chars', 2000)
+        max_chars = st.slider(f"Maximum characters in result snippet (Max for your tier: {allowed_max_chars}):", min_value=100, max_value=allowed_max_chars, value=min(1500, allowed_max_chars), step=100)
+        submitted = st.form_submit_button("Search Web")
 
-    if st.button("Search Web"):
+    if submitted:
         if query:
             with st.spinner("Searching the web..."):
                 try:
-                    result = finance_search_web(query=query, user_token=user_token, max_chars=max_chars)
+                    result = _cached_search(query, max_chars, user_token)
                     st.subheader("Search Results:")
                     st.markdown(result)
                 except Exception as e:
@@ -109,41 +269,24 @@ if tool_selection == "Web Search (General Financial Info)":
         else:
             st.warning("Please enter a query to search.")
 
-# --- Stock Price Checker ---
-elif tool_selection == "Stock Price Checker":
-    st.subheader("Stock Price Checker")
-    symbol = st.text_input("Enter stock symbol (e.g., AAPL, GOOGL):", placeholder="AAPL")
+# --- Stock / Crypto Price Checkers ---
+elif tool_selection in _PRICE_CHECKERS:
+    kind, input_label, placeholder, checker = _PRICE_CHECKERS[tool_selection]
+    st.subheader(tool_selection)
+    symbol = st.text_input(input_label, placeholder=placeholder)
     
-    if st.button("Get Stock Price"):
+    if st.button(f"Get {kind} Price"):
         if symbol:
             with st.spinner(f"Fetching price for {symbol}..."):
                 try:
-                    result = stock_price_checker(symbol=symbol)
+                    result = getattr(_finance_tool(), checker)(symbol=symbol)
                     st.subheader(f"Current Price for {symbol.upper()}:")
                     st.markdown(result)
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
-                    logger.error(f"Stock price check failed: {e}", exc_info=True)
+                    logger.error(f"{kind} price check failed: {e}", exc_info=True)
         else:
-            st.warning("Please enter a stock symbol.")
-
-# --- Crypto Price Checker ---
-elif tool_selection == "Crypto Price Checker":
-    st.subheader("Crypto Price Checker")
-    symbol = st.text_input("Enter cryptocurrency symbol (e.g., BTC, ETH):", placeholder="BTC")
-    
-    if st.button("Get Crypto Price"):
-        if symbol:
-            with st.spinner(f"Fetching price for {symbol}..."):
-                try:
-                    result = crypto_price_checker(symbol=symbol)
-                    st.subheader(f"Current Price for {symbol.upper()}:")
-                    st.markdown(result)
-                except Exception as e:
-                    st.error(f"An error occurred: {e}")
-                    logger.error(f"Crypto price check failed: {e}", exc_info=True)
-        else:
-            st.warning("Please enter a crypto symbol.")
+            st.warning(f"Please enter a {kind.lower()} symbol.")
 
 # --- Economic Indicator Checker ---
 elif tool_selection == "Economic Indicator Checker":
@@ -158,7 +301,7 @@ elif tool_selection == "Economic Indicator Checker":
         if indicator_type:
             with st.spinner(f"Fetching {indicator_type} value..."):
                 try:
-                    result = economic_indicator_checker(indicator_type=indicator_type)
+                    result = _finance_tool().economic_indicator_checker(indicator_type=indicator_type)
                     st.subheader(f"Latest {indicator_type} Value:")
                     st.markdown(result)
                 except Exception as e:
@@ -170,40 +313,40 @@ elif tool_selection == "Economic Indicator Checker":
 # --- Financial Data Fetcher (Advanced) ---
 elif tool_selection == "Financial Data Fetcher (Advanced)":
     st.subheader("Advanced Financial Data Fetcher")
+    from datetime import datetime, timedelta # For date inputs; only this branch needs them
     st.info("This tool directly interacts with configured financial APIs. Note that many real financial APIs require specific access and may have usage limits.")
 
     api_name = st.selectbox(
         "Select API to use:",
-        ("AlphaVantage", "FinancialModelingPrep", "CoinMarketCap", "CoinGecko"),
+        tuple(_DATA_TYPES),
         key="advanced_api_select"
     )
 
-    data_type_options = []
-    if api_name in ["AlphaVantage", "FinancialModelingPrep"]:
-        data_type_options = ["stock_data", "economic_indicator"]
-    elif api_name in ["CoinMarketCap", "CoinGecko"]:
-        data_type_options = ["crypto_data"]
+    data_type_options = _DATA_TYPES[api_name]
 
-    data_type = st.selectbox(
-        "Select Data Type:",
-        data_type_options,
-        key="advanced_data_type_select"
-    )
+    # The API selection stays outside the form because it drives the data type options
+    with st.form("advanced_fetch"):
+        data_type = st.selectbox(
+            "Select Data Type:",
+            data_type_options,
+            key="advanced_data_type_select"
+        )
 
-    symbol_input = st.text_input("Symbol (e.g., AAPL, BTC):", key="symbol_input_fetcher")
-    interval_input = st.text_input("Interval (for historical stock data, e.g., 1min, 5min, daily, weekly, monthly):", key="interval_input_fetcher")
-    indicator_type_input = st.text_input("Indicator Type (for economic indicator, e.g., CPI, GDP):", key="indicator_type_input_fetcher")
-    start_date_input = st.date_input("Start Date (optional, YYYY-MM-DD):", datetime.today() - timedelta(days=30), key="start_date_input_fetcher")
-    end_date_input = st.date_input("End Date (optional, YYYY-MM-DD):", datetime.today(), key="end_date_input_fetcher")
-    limit_input = st.number_input("Limit results (optional):", min_value=1, value=5, step=1, key="limit_input_fetcher")
+        symbol_input = st.text_input("Symbol (e.g., AAPL; CoinGecko IDs like bitcoin; base currency like USD):", key="symbol_input_fetcher")
+        interval_input = st.text_input("Interval (for historical stock data, e.g., 1min, 5min, daily, weekly, monthly):", key="interval_input_fetcher")
+        indicator_type_input = st.text_input("Indicator Type (for economic indicator, e.g., CPI, GDP):", key="indicator_type_input_fetcher")
+        start_date_input = st.date_input("Start Date (optional, YYYY-MM-DD):", datetime.today() - timedelta(days=30), key="start_date_input_fetcher")
+        end_date_input = st.date_input("End Date (optional, YYYY-MM-DD):", datetime.today(), key="end_date_input_fetcher")
+        limit_input = st.number_input("Limit results (optional):", min_value=1, value=5, step=1, key="limit_input_fetcher")
+        submitted = st.form_submit_button("Fetch Advanced Financial Data")
 
-    if st.button("Fetch Advanced Financial Data"):
+    if submitted:
         if not symbol_input and not indicator_type_input:
             st.warning("Please enter a symbol or an indicator type.")
         else:
             with st.spinner(f"Fetching {data_type} data from {api_name}..."):
                 try:
-                    result_json_str = finance_data_fetcher(
+                    result_json_str = _cached_fetch(
                         api_name=api_name,
                         data_type=data_type,
                         symbol=symbol_input if symbol_input else None,
@@ -216,36 +359,71 @@ elif tool_selection == "Financial Data Fetcher (Advanced)":
                     
                     st.subheader("Fetched Data:")
                     try:
-                        parsed_data = json.loads(result_json_str)
-                        st.json(parsed_data)
+                        parsed_data = orjson.loads(result_json_str)
+                        if len(result_json_str) < _MAX_JSON_TREE_CHARS:
+                            st.json(parsed_data)
+                        else:
+                            # Rendering a multi-MB response as a JSON tree stalls the browser; show a preview
+                            with st.expander(f"Raw JSON (large: {len(result_json_str):,} characters)"):
+                                st.code(result_json_str[:_JSON_PREVIEW_CHARS] + "\n...", language="json")
                         
                         # Attempt to display as DataFrame if suitable
-                        if isinstance(parsed_data, dict) and (parsed_data.get('Time Series (Daily)') or parsed_data.get('Time Series (Weekly)') or parsed_data.get('Time Series (Monthly)')):
-                            # Alpha Vantage time series
-                            time_series_key = next((k for k in parsed_data if 'Time Series' in k), None)
-                            if time_series_key:
-                                df = pd.DataFrame.from_dict(parsed_data[time_series_key], orient='index')
-                                df.index.name = 'Date'
+                        if isinstance(parsed_data, dict):
+                            df = _av_daily_df(result_json_str) # Alpha Vantage time series
+                            if df is None:
+                                df = _cg_prices_df(result_json_str) # CoinGecko market chart
+                            if df is None:
+                                df = _exr_rates_df(result_json_str) # ExchangeRate-API latest rates
+                            if df is not None:
                                 st.subheader("Data as DataFrame:")
-                                st.dataframe(df)
+                                st.dataframe(_limit_rows(df, int(limit_input)))
+                            else:
+                                st.write("Data is a dictionary.")
                         elif isinstance(parsed_data, list) and parsed_data:
                             try:
-                                df = pd.DataFrame(parsed_data)
+                                df = _records_df(result_json_str)
                                 st.subheader("Data as DataFrame:")
-                                st.dataframe(df)
+                                st.dataframe(_limit_rows(df, int(limit_input)))
                             except Exception as df_e:
                                 logger.warning(f"Could not convert fetched list data to DataFrame: {df_e}")
                                 st.write("Could not display as DataFrame.")
-                        elif isinstance(parsed_data, dict):
-                            st.write("Data is a dictionary.")
 
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         st.write(result_json_str) # If not JSON, display as plain text
                     
                 except Exception as e:
                     st.error(f"An error occurred during data fetching: {e}")
                     logger.error(f"Financial data fetcher failed: {e}", exc_info=True)
 
+    st.markdown("---")
+    st.subheader("Market Snapshot")
+    st.caption("Fetches a stock quote, crypto prices and exchange rates concurrently.")
+    with st.form("market_snapshot"):
+        snapshot_symbol = st.text_input("Stock symbol(s):", value="AAPL", key="snapshot_symbol")
+        snapshot_ids = st.text_input("Crypto IDs:", value="bitcoin,ethereum", key="snapshot_ids")
+        snapshot_base = st.text_input("Base currency:", value="USD", key="snapshot_base")
+        snapshot_submitted = st.form_submit_button("Fetch All")
+
+    if snapshot_submitted:
+        specs = [
+            {"api_name": "AlphaVantage", "data_type": "global_quote", "symbol": snapshot_symbol},
+            {"api_name": "CoinGecko", "data_type": "crypto_price", "ids": snapshot_ids, "vs_currencies": snapshot_base.lower()},
+            {"api_name": "ExchangeRate-API", "data_type": "exchange_rate_latest", "base_currency": snapshot_base},
+        ]
+        with st.spinner("Fetching market snapshot..."):
+            try:
+                results = _cached_multi_fetch(specs)
+            except Exception as e:
+                st.error(f"An error occurred during data fetching: {e}")
+                logger.error(f"Market snapshot fetch failed: {e}", exc_info=True)
+                results = []
+        for spec, result in zip(specs, results):
+            with st.expander(f"{spec['api_name']} ({spec['data_type']})", expanded=True):
+                try:
+                    st.json(orjson.loads(result))
+                except orjson.JSONDecodeError:
+                    st.write(result)
+
 
 st.markdown("---")
 st.caption(f"Current User Token: `{current_user.get('user_id', 'N/A')}` (for demo purposes)")
@@ -1,20 +1,47 @@
 # finance_tools/finance_tool.py
 
 import requests
-import json
-from typing import Optional, List, Dict, Any
+import orjson
+import asyncio
+import functools
+from typing import Optional, List, Dict, Any, Tuple, Union, Callable, Literal, TYPE_CHECKING
 from pathlib import Path
+from datetime import datetime, timezone
 import logging
-import yaml # Added for loading finance_apis.yaml
+import re
+import threading
+import time
+import hashlib
+import mmap
+import os
+import stat
+from cachetools import LRUCache, TTLCache, TLRUCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import uvloop # Optional: a libuv event loop with lower per-task overhead for large fan-outs
+except ImportError:
+    uvloop = None
+
+try:
+    from blake3 import blake3 # Optional: SIMD, multi-threaded hashing for the summary cache keys
+except ImportError:
+    blake3 = None
+
+if TYPE_CHECKING:
+    import httpx
+    import numpy as np
 
 # Import generic tools
 from langchain_core.tools import tool
-from shared_tools.query_uploaded_docs_tool import QueryUploadedDocs
+from shared_tools.query_uploaded_docs_tool import QueryUploadedDocs, search_uploaded_docs
 from shared_tools.scraper_tool import scrape_web
 from shared_tools.doc_summarizer import summarize_document
+from shared_tools.json_stream_utils import LimitedItemsParser, find_list
 from shared_tools.import_utils import process_upload, clear_indexed_data # Used by Streamlit apps, not directly as agent tools
 from shared_tools.export_utils import export_response, export_vector_results # To be used internally by other tools, or for direct exports
-from shared_tools.vector_utils import build_vectorstore, load_docs_from_json_file, BASE_VECTOR_DIR # For testing and potential future direct use
+from shared_tools.vector_utils import build_vectorstore, load_docs_from_json_file, query_vectorstore_batch, BASE_VECTOR_DIR # For testing and potential future direct use
 
 # REMOVED: from langchain_community.tools.python.tool import PythonREPLTool
 # The Python interpreter is now managed and imported via shared_tools/python_interpreter_tool.py
@@ -29,6 +56,43 @@ DEFAULT_USER_TOKEN = "default" # Or use a proper user management if available
 
 logger = logging.getLogger(__name__)
 
+# In-process result caches. Searches and API responses are reused for a short window, so an agent
+# (or several sessions) repeating a call is served from memory instead of the network.
+_SEARCH_CACHE = TTLCache(maxsize=1024, ttl=300)
+
+# How long (in seconds) an API response stays fresh, by data_type. Prices go stale within a minute;
+# company fundamentals, coin listings and reference rates change far less often.
+_FETCH_CACHE_TTLS = {
+    "crypto_price": 30,
+    "global_quote": 60,
+    "crypto_market_chart": 300,
+    "stock_prices": 3600,
+    "exchange_rate_latest": 3600,
+    "exchange_rate_convert": 3600,
+    "company_overview": 86400,
+    "crypto_list": 604800,
+}
+_DEFAULT_FETCH_CACHE_TTL = 60
+
+def _fetch_cache_ttu(key: Tuple, value: Any, now: float) -> float:
+    """Returns the expiry time for a fetch cache entry based on its data_type (the key's second item)."""
+    return now + _FETCH_CACHE_TTLS.get(key[1], _DEFAULT_FETCH_CACHE_TTL)
+
+_FETCH_CACHE = TLRUCache(maxsize=2048, ttu=_fetch_cache_ttu)
+_CACHE_LOCK = threading.Lock() # Streamlit serves sessions from multiple threads
+
+def _cache_get(cache: Union[LRUCache, TTLCache, TLRUCache], key: Tuple) -> Any:
+    with _CACHE_LOCK:
+        return cache.get(key)
+
+def _cache_put(cache: Union[LRUCache, TTLCache, TLRUCache], key: Tuple, value: Any) -> None:
+    with _CACHE_LOCK:
+        cache[key] = value
+
+def _search_cache_key(query: str, max_chars: int) -> Tuple[str, int]:
+    """Normalizes the query so trivial variants (case, surrounding whitespace) share an entry."""
+    return (query.strip().lower(), max_chars)
+
 @tool
 def finance_search_web(query: str, user_token: str = DEFAULT_USER_TOKEN, max_chars: int = 2000) -> str:
     """
@@ -43,8 +107,58 @@ def finance_search_web(query: str, user_token: str = DEFAULT_USER_TOKEN, max_cha
     Returns:
         str: A string containing relevant information from the web.
     """
-    logger.info(f"Tool: finance_search_web called with query: '{query}' for user: '{user_token}'")
-    return scrape_web(query=query, user_token=user_token, max_chars=max_chars)
+    logger.info("Tool: finance_search_web called with query: '%s' for user: '%s'", query, user_token)
+    cache_key = _search_cache_key(query, max_chars)
+    result = _cache_get(_SEARCH_CACHE, cache_key)
+    if result is None:
+        result = scrape_web(query=query, user_token=user_token, max_chars=max_chars)
+        _cache_put(_SEARCH_CACHE, cache_key, result)
+    return result
+
+async def _afinance_search_web(query: str, user_token: str = DEFAULT_USER_TOKEN, max_chars: int = 2000) -> str:
+    """Async implementation of `finance_search_web`; runs the blocking search off the event loop."""
+    logger.info("Tool: finance_search_web (async) called with query: '%s' for user: '%s'", query, user_token)
+    cache_key = _search_cache_key(query, max_chars)
+    result = _cache_get(_SEARCH_CACHE, cache_key)
+    if result is None:
+        result = await asyncio.to_thread(scrape_web, query=query, user_token=user_token, max_chars=max_chars)
+        _cache_put(_SEARCH_CACHE, cache_key, result)
+    return result
+
+finance_search_web.coroutine = _afinance_search_web
+
+@tool
+def finance_search_web_batch(queries: List[str], user_token: str = DEFAULT_USER_TOKEN, max_chars: int = 2000) -> str:
+    """
+    Runs several finance web searches concurrently in a single call.
+    Use this instead of calling `finance_search_web` repeatedly when one question needs
+    several searches (e.g., news for each company being compared).
+    
+    Args:
+        queries (List[str]): The finance-related search queries.
+        user_token (str): The unique identifier for the user. Defaults to "default".
+        max_chars (int): Maximum characters for each returned snippet. Defaults to 2000.
+    
+    Returns:
+        str: The result of each search, in the order given.
+    """
+    logger.info("Tool: finance_search_web_batch called with %d queries for user: '%s'", len(queries), user_token)
+    return run_async(_afinance_search_web_batch(queries, user_token=user_token, max_chars=max_chars))
+
+async def _afinance_search_web_batch(queries: List[str], user_token: str = DEFAULT_USER_TOKEN, max_chars: int = 2000) -> str:
+    """Async implementation of `finance_search_web_batch`; the searches overlap their network waits."""
+    if not queries:
+        return "Error: 'queries' must contain at least one search query."
+    results = await asyncio.gather(
+        *(_afinance_search_web(query, user_token=user_token, max_chars=max_chars) for query in queries),
+        return_exceptions=True
+    )
+    return "\n\n".join(
+        f"Result {i} ({query}):\n{result if isinstance(result, str) else f'Error: search failed: {result}'}"
+        for i, (query, result) in enumerate(zip(queries, results), start=1)
+    )
+
+finance_search_web_batch.coroutine = _afinance_search_web_batch
 
 @tool
 def finance_query_uploaded_docs(query: str, user_token: str = DEFAULT_USER_TOKEN, export: Optional[bool] = False, k: int = 5) -> str:
@@ -62,8 +176,127 @@ def finance_query_uploaded_docs(query: str, user_token: str = DEFAULT_USER_TOKEN
         str: A string containing the combined content of the relevant document chunks,
              or a message indicating no data/results found, or the export path if exported.
     """
-    logger.info(f"Tool: finance_query_uploaded_docs called with query: '{query}' for user: '{user_token}'")
-    return QueryUploadedDocs(query=query, user_token=user_token, section=FINANCE_SECTION, export=export, k=k)
+    logger.info("Tool: finance_query_uploaded_docs called with query: '%s' for user: '%s'", query, user_token)
+    shortlist_size = config_manager.get('rag.rerank_shortlist', 0)
+    if not shortlist_size or shortlist_size <= k:
+        return QueryUploadedDocs(query=query, user_token=user_token, section=FINANCE_SECTION, export=export, k=k)
+
+    # Two-stage retrieval (opt-in, it costs an LLM call per query): a wide, cheap vector shortlist,
+    # then one LLM call picks the best k
+    return search_uploaded_docs(query, user_token, FINANCE_SECTION, export, k, rerank=_rerank_documents, shortlist_k=shortlist_size)
+
+# Each shortlisted passage is truncated to this many characters in the rerank prompt
+_RERANK_PASSAGE_CHARS = 500
+
+def _rerank_documents(query: str, documents: List[Any], k: int) -> List[Any]:
+    """
+    Reorders vector-search results by LLM-judged relevance to the query and keeps the top `k`.
+    Raw embedding similarity misses negation and nuance; the LLM reads the passages. Falls back
+    to the vector order if the LLM call fails, and keeps vector order for passages it omits.
+    """
+    if len(documents) <= k:
+        return documents
+
+    passages = "\n\n".join(f"[{i}] {doc.page_content.strip()[:_RERANK_PASSAGE_CHARS]}" for i, doc in enumerate(documents))
+    prompt = (
+        "Rank the passages below by how well they help answer the query. Reply with the passage numbers only, "
+        "most relevant first, separated by commas.\n\n"
+        f"Query: {query}\n\nPassages:\n{passages}\n\nRanking:"
+    )
+    try:
+        from shared_tools.llm_embedding_utils import get_llm
+        reply = get_llm(override_temperature=0).invoke(prompt)
+        order = [int(n) for n in re.findall(r"\d+", str(getattr(reply, "content", reply)))]
+    except Exception as e:
+        logger.warning("Reranking failed, using vector search order: %s", e)
+        return documents[:k]
+
+    ranked = dict.fromkeys(i for i in order if 0 <= i < len(documents)) # Ordered, de-duplicated
+    ranked.update(dict.fromkeys(range(len(documents)))) # Omitted passages follow in vector order
+    return [documents[i] for i in list(ranked)[:k]]
+
+@tool
+def finance_query_uploaded_docs_batch(queries: List[str], user_token: str = DEFAULT_USER_TOKEN, k: int = 5) -> str:
+    """
+    Queries previously uploaded and indexed finance documents with several queries in one call.
+    Use this instead of calling `finance_query_uploaded_docs` repeatedly when a question breaks down
+    into several sub-questions; all queries are embedded and searched together.
+    
+    Args:
+        queries (List[str]): The search queries (e.g., ["Q3 revenue", "Q3 operating margin"]).
+        user_token (str): The unique identifier for the user. Defaults to "default".
+        k (int): The number of top relevant documents to retrieve per query. Defaults to 5.
+    
+    Returns:
+        str: The combined content of the relevant document chunks for each query, in the order given,
+             or a message indicating no data was found.
+    """
+    logger.info("Tool: finance_query_uploaded_docs_batch called with %d queries for user: '%s'", len(queries), user_token)
+    if not queries:
+        return "Error: 'queries' must contain at least one search query."
+    if not (BASE_VECTOR_DIR / user_token / FINANCE_SECTION).exists():
+        return f"No indexed data found for section '{FINANCE_SECTION}'. Please upload relevant documents first."
+
+    results_per_query = query_vectorstore_batch(queries, user_token, FINANCE_SECTION, k=k)
+    return "\n\n".join(
+        f"Result {i} ({query}):\n" + (
+            "\n\n---\n\n".join(doc.page_content.strip() for doc in results)
+            or f"No matching results found in uploaded content for section '{FINANCE_SECTION}'."
+        )
+        for i, (query, results) in enumerate(zip(queries, results_per_query), start=1)
+    )
+
+# Summaries are cached on disk by file content and model, so re-summarizing an unchanged file skips the LLM
+_SUMMARY_CACHE_DIR = Path(".cache/summaries")
+
+# Digests of recently hashed files by (path, inode, size, mtime_ns), so re-summarizing an unchanged
+# file skips re-reading it
+_DIGEST_MEMO = LRUCache(maxsize=128)
+
+def _content_digest(buffer: Any) -> str:
+    """Hashes a bytes-like buffer with BLAKE3 when the blake3 package is installed, SHA-256 otherwise."""
+    if blake3 is not None:
+        return blake3(buffer, max_threads=blake3.AUTO).hexdigest()
+    return hashlib.sha256(buffer).hexdigest()
+
+def _file_digest(file_path_str: str) -> str:
+    """
+    Returns the digest of a file's contents (see `_content_digest`), hashed from a read-only memory map
+    rather than a copy.
+    The file is opened once with os.open (which also serves as the existence check) and sized with
+    fstat on that descriptor, so no separate stat calls are made.
+    """
+    fd = os.open(file_path_str, os.O_RDONLY)
+    try:
+        file_stat = os.fstat(fd)
+        if stat.S_ISDIR(file_stat.st_mode):
+            raise IsADirectoryError(file_path_str) # os.open, unlike open(), accepts directories
+        memo_key = (file_path_str, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        digest = _cache_get(_DIGEST_MEMO, memo_key)
+        if digest is None:
+            if file_stat.st_size == 0:
+                digest = _content_digest(b"") # mmap cannot map an empty file
+            else:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    digest = _content_digest(mapped)
+            _cache_put(_DIGEST_MEMO, memo_key, digest)
+        return digest
+    finally:
+        os.close(fd)
+
+def _summary_cache_path(digest: str) -> Path:
+    model_id = f"{config_manager.get('llm.provider', 'openai')}-{config_manager.get('llm.model', 'gpt-4o')}"
+    return _SUMMARY_CACHE_DIR / f"{digest}_{model_id.replace('/', '_')}.txt"
+
+def _write_cached_summary(cache_path: Path, summary: str) -> None:
+    """Writes the summary via a temp file and os.replace so readers never see a partial file."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(summary, encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache summary at '%s': %s", cache_path, e)
 
 @tool
 def finance_summarize_document_by_path(file_path_str: str) -> str:
@@ -79,11 +312,24 @@ def finance_summarize_document_by_path(file_path_str: str) -> str:
     Returns:
         str: A concise summary of the document content.
     """
-    logger.info(f"Tool: finance_summarize_document_by_path called for file: '{file_path_str}'")
+    logger.info("Tool: finance_summarize_document_by_path called for file: '%s'", file_path_str)
     file_path = Path(file_path_str)
-    if not file_path.exists():
-        logger.error(f"Document not found at '{file_path_str}' for summarization.")
+    try:
+        cache_path = _summary_cache_path(_file_digest(file_path_str)) # Opening the file doubles as the existence check
+    except (FileNotFoundError, IsADirectoryError):
+        logger.error("Document not found at '%s' for summarization.", file_path_str)
         return f"Error: Document not found at '{file_path_str}'."
+    except OSError as e:
+        logger.warning("Could not hash '%s' for the summary cache: %s", file_path_str, e)
+        cache_path = None
+
+    if cache_path is not None:
+        try:
+            cached_summary = cache_path.read_text(encoding='utf-8') # A miss raises instead of needing a prior stat
+            logger.info("Serving cached summary for '%s'.", file_path_str)
+            return f"Summary of '{file_path.name}':\n{cached_summary}"
+        except FileNotFoundError:
+            pass
     
     try:
         # Note: The summarize_document tool now handles its own RBAC check internally
@@ -91,36 +337,805 @@ def finance_summarize_document_by_path(file_path_str: str) -> str:
         # For simplicity here, we're assuming summarize_document will handle it
         # or that this tool itself is only available to tiers with summarization.
         summary = summarize_document(file_path) # Assuming summarize_document can take Path object
+        if cache_path is not None and str(summary).startswith("Summary of"): # Only successful summaries are cached
+            _write_cached_summary(cache_path, str(summary))
         return f"Summary of '{file_path.name}':\n{summary}"
     except ValueError as e:
-        logger.error(f"Error summarizing document '{file_path_str}': {e}")
+        logger.error("Error summarizing document '%s': %s", file_path_str, e)
         return f"Error summarizing document: {e}"
     except Exception as e:
-        logger.critical(f"An unexpected error occurred during summarization of '{file_path_str}': {e}", exc_info=True)
+        logger.critical("An unexpected error occurred during summarization of '%s': %s", file_path_str, e, exc_info=True)
         return f"An unexpected error occurred during summarization: {e}"
 
+def _finance_docs_arg_error(op: str, query: Optional[str], file_path_str: Optional[str]) -> Optional[str]:
+    """Returns an error message if `op` is unknown or its required argument is missing."""
+    if op in ("search_web", "query_docs"):
+        return None if query else f"Error: 'query' is required for op '{op}'."
+    if op == "summarize":
+        return None if file_path_str else "Error: 'file_path_str' is required for op 'summarize'."
+    return f"Error: Unsupported op '{op}'. Supported ops: search_web, query_docs, summarize."
+
+@tool
+def finance_docs(
+    op: Literal["search_web", "query_docs", "summarize"],
+    query: Optional[str] = None,
+    file_path_str: Optional[str] = None,
+    user_token: str = DEFAULT_USER_TOKEN,
+    max_chars: int = 2000,
+    k: int = 5,
+    export: bool = False
+) -> str:
+    """
+    Finds or condenses finance text: searches the web, queries the user's uploaded documents, or
+    summarizes a document at a file path. One tool for the three, so the agent picks an op instead
+    of choosing between separate tools.
+    
+    Args:
+        op (str): "search_web" for financial news and up-to-date information from the internet,
+                  "query_docs" to search the user's uploaded finance documents, or
+                  "summarize" to summarize the document at `file_path_str`.
+        query (str, optional): The search query (required for "search_web" and "query_docs").
+        file_path_str (str, optional): Path to the document (required for "summarize").
+        user_token (str): The unique identifier for the user. Defaults to "default".
+        max_chars (int): Maximum characters for the web search results ("search_web"). Defaults to 2000.
+        k (int): Number of top documents to retrieve ("query_docs"). Defaults to 5.
+        export (bool): Whether to export the retrieved documents to a file ("query_docs"). Defaults to False.
+    
+    Returns:
+        str: The search results, the retrieved document passages, or the summary; or an error message.
+    """
+    logger.info("Tool: finance_docs called with op: '%s'", op)
+    arg_error = _finance_docs_arg_error(op, query, file_path_str)
+    if arg_error:
+        return arg_error
+    if op == "search_web":
+        return finance_search_web.func(query, user_token, max_chars)
+    if op == "query_docs":
+        return finance_query_uploaded_docs.func(query, user_token, export, k)
+    return finance_summarize_document_by_path.func(file_path_str)
+
+async def _afinance_docs(
+    op: str,
+    query: Optional[str] = None,
+    file_path_str: Optional[str] = None,
+    user_token: str = DEFAULT_USER_TOKEN,
+    max_chars: int = 2000,
+    k: int = 5,
+    export: bool = False
+) -> str:
+    """Async implementation of `finance_docs`; web searches use the async search path, the other ops run in a worker thread."""
+    if op == "search_web" and query:
+        return await _afinance_search_web(query, user_token, max_chars)
+    return await asyncio.to_thread(finance_docs.func, op, query, file_path_str, user_token, max_chars, k, export)
+
+finance_docs.coroutine = _afinance_docs
+
 # === Advanced Finance Tools ===
 
 # REMOVED: Direct import and initialization of PythonREPLTool.
 # The python_interpreter_with_rbac tool is now imported and added conditionally
 # in the *_chat_agent_app.py files based on RBAC.
 
+_FINANCE_APIS_PATH = Path("data/finance_apis.yaml")
+
+# URL paths used when an API's YAML 'functions' entry has no 'path' of its own
+_DEFAULT_URL_PATHS = {
+    "CoinGecko": {"COINS_MARKET_CHART": "coins/{id}/market_chart"},
+    "ExchangeRate-API": {
+        "LATEST": "{api_key}/latest/{base_currency}",
+        "PAIR_CONVERSION": "{api_key}/pair/{base_currency}/{target_currency}/{amount}",
+    },
+}
+
+@functools.lru_cache(maxsize=4)
+def _parse_finance_apis(path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parses finance_apis.yaml into a dict keyed by API name. Cached per (path, mtime), so an edited file is re-read."""
+    import yaml # Only the fetcher needs the API config, so yaml is imported on first use
+
+    # libyaml's C loader when PyYAML was built with it; the pure-Python loader otherwise
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path_str, "r") as f:
+        full_config = yaml.load(f, Loader=loader) or {}
+    apis = {api['name']: api for api in full_config.get('apis', [])}
+    # Join each function's path onto the endpoint once here; the builders fill the placeholders with format_map
+    for api_name, api in apis.items():
+        paths = {**_DEFAULT_URL_PATHS.get(api_name, {})}
+        paths.update({name: info['path'] for name, info in (api.get('functions') or {}).items() if info and info.get('path')})
+        api["_url_templates"] = {name: f"{api.get('endpoint', '')}{path}" for name, path in paths.items()}
+        # Resolve secret references once here so the fetcher doesn't hit the secrets backend per call
+        key_value = api.get("key_value")
+        if key_value and key_value.startswith("load_from_secrets."):
+            api["_resolved_key"] = config_manager.get_secret(key_value.removeprefix("load_from_secrets."))
+    return apis
+
 # Helper to load API configs
 def _load_finance_apis() -> Dict[str, Any]:
-    """Loads finance API configurations from data/finance_apis.yaml."""
-    finance_apis_path = Path("data/finance_apis.yaml")
-    if not finance_apis_path.exists():
-        logger.warning(f"data/finance_apis.yaml not found at {finance_apis_path}")
+    """Loads finance API configurations from data/finance_apis.yaml, re-parsing only when the file has changed."""
+    try:
+        mtime_ns = _FINANCE_APIS_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        logger.warning("data/finance_apis.yaml not found at %s", _FINANCE_APIS_PATH)
         return {}
     try:
-        with open(finance_apis_path, "r") as f:
-            full_config = yaml.safe_load(f) or {}
-            return {api['name']: api for api in full_config.get('apis', [])}
+        return _parse_finance_apis(str(_FINANCE_APIS_PATH), mtime_ns)
     except Exception as e:
-        logger.error(f"Error loading finance_apis.yaml: {e}")
+        logger.error("Error loading finance_apis.yaml: %s", e)
         return {}
 
-FINANCE_APIS_CONFIG = _load_finance_apis()
+def refresh_finance_apis() -> None:
+    """
+    Drops the parsed finance API config, with the API keys resolved from it, and the cached read timeout,
+    e.g. after an API key is rotated in secrets.toml. The next fetch reloads them.
+    """
+    _parse_finance_apis.cache_clear()
+    _read_timeout.cache_clear()
+
+# Connect timeout for finance API calls; the read timeout comes from web_scraping.timeout_seconds.
+_CONNECT_TIMEOUT_SECONDS = 3.05
+# Error bodies (often full HTML error pages) are cut to this many characters before they are logged
+# or handed back to the agent as tool output.
+_MAX_ERROR_BODY_CHARS = 1000
+
+@functools.cache
+def _read_timeout() -> float:
+    """
+    Returns the read timeout for finance API calls, read from the config once instead of per call.
+    `refresh_finance_apis()` clears it after the config is reloaded.
+    """
+    return config_manager.get('web_scraping.timeout_seconds', 10)
+
+@functools.cache
+def _http_session() -> requests.Session:
+    """
+    Returns the HTTP session shared by all finance API calls.
+    Keep-alive connections are pooled per host, so follow-up calls skip the TCP/TLS handshake,
+    and transient failures (429/5xx, connection errors) are retried with exponential backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False # Return the final response so raise_for_status() reports the API's error
+        )
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@functools.cache
+def _http2_client() -> "httpx.Client":
+    """
+    Returns the sync HTTP/2 client shared by single calls to APIs marked `http2: true` in finance_apis.yaml.
+    Concurrent calls from different sessions are multiplexed as streams over one TLS connection per host,
+    instead of each taking (or opening) a pooled HTTP/1.1 connection. Failed connects are retried.
+    """
+    import httpx
+
+    limits = httpx.Limits(max_keepalive_connections=10, max_connections=20)
+    return httpx.Client(transport=httpx.HTTPTransport(http2=True, limits=limits, retries=3))
+
+def run_async(coro):
+    """
+    Runs a coroutine to completion from synchronous code, on a private uvloop loop when uvloop is
+    installed and on the default asyncio loop otherwise. The global event loop policy is left
+    alone so Streamlit's own loop is unaffected.
+    """
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+# Longest a call queues for its API's rate limit; past this it fails fast instead of blocking the agent
+# (a single call sleeps on the Streamlit session thread, so keep this to about one AlphaVantage interval)
+_MAX_RATE_LIMIT_WAIT_SECONDS = 15.0
+
+class _RateLimitExceeded(Exception):
+    """Raised for a call that would have to wait longer than _MAX_RATE_LIMIT_WAIT_SECONDS for a token."""
+
+class _TokenBucket:
+    """
+    Client-side token bucket for one API: up to `burst` calls go out back to back, then one every
+    60 / rate_per_minute seconds. Calls over the limit wait for their token instead of being sent
+    and answered with a 429 (which the session would then retry with backoff).
+    """
+
+    def __init__(self, api_name: str, rate_per_minute: float, burst: int = 1):
+        self.api_name = api_name
+        self.interval = 60.0 / rate_per_minute
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock() # Shared by Streamlit's session threads and the async fan-outs
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) / self.interval)
+        self._updated = now
+
+    def _next_wait(self) -> float:
+        return max(0.0, (1.0 - self._tokens) * self.interval)
+
+    def reserve(self, count: int = 1) -> List[float]:
+        """
+        Takes up to `count` tokens in one go, possibly ones not yet refilled, and returns how long to
+        wait before using each. Stops at the first token that would take longer than
+        _MAX_RATE_LIMIT_WAIT_SECONDS, so the calls left over take no tokens and fail without delaying
+        later callers.
+        """
+        waits = []
+        with self._lock:
+            self._refill()
+            while len(waits) < count and self._next_wait() <= _MAX_RATE_LIMIT_WAIT_SECONDS:
+                waits.append(self._next_wait())
+                self._tokens -= 1.0 # May go negative: later callers queue behind the reservations already made
+        if waits and waits[-1]:
+            logger.info("Waiting up to %.1fs for the %s rate limit.", waits[-1], self.api_name)
+        return waits
+
+    def refund(self, count: int = 1) -> None:
+        """Gives back tokens from `reserve` whose calls were not sent after all."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + count)
+
+    def exceeded(self) -> _RateLimitExceeded:
+        """The error for a call `reserve` had no token for."""
+        with self._lock:
+            self._refill()
+            wait = self._next_wait()
+        return _RateLimitExceeded(f"rate limit reached, retry in {wait:.0f}s")
+
+    def acquire(self) -> None:
+        """Blocks until a call may be sent, or raises _RateLimitExceeded without taking a token."""
+        waits = self.reserve()
+        if not waits:
+            raise self.exceeded()
+        if waits[0]:
+            time.sleep(waits[0])
+
+@functools.lru_cache(maxsize=16)
+def _token_bucket(api_name: str, rate_per_minute: float, burst: int) -> _TokenBucket:
+    """Returns the bucket shared by all calls to an API; editing its limits in the YAML starts a new one."""
+    return _TokenBucket(api_name, rate_per_minute, burst)
+
+def _rate_limiter(api_name: str) -> Optional[_TokenBucket]:
+    """Returns the token bucket for `api_name`, or None if finance_apis.yaml sets no 'rate_limit_per_minute' for it."""
+    api_info = _load_finance_apis().get(api_name) or {}
+    rate_per_minute = api_info.get("rate_limit_per_minute")
+    if not rate_per_minute:
+        return None
+    return _token_bucket(api_name, float(rate_per_minute), int(api_info.get("rate_limit_burst", 1)))
+
+# AlphaVantage's REALTIME_BULK_QUOTES endpoint accepts up to 100 comma-separated symbols
+_MAX_BULK_QUOTE_SYMBOLS = 100
+# At most this many requests of one fanned-out call (e.g. one market chart per CoinGecko id) are in flight at once
+_MAX_CONCURRENT_FAN_OUT = 8
+
+def _split_symbols(symbol: Optional[str]) -> List[str]:
+    """Splits a comma-separated symbol argument (e.g., "AAPL, MSFT") into individual symbols."""
+    if not symbol:
+        return []
+    return [s.strip() for s in symbol.split(",") if s.strip()]
+
+# Comma-separated arguments whose endpoint takes a single item, by (api_name, data_type); a list
+# becomes one request per item. CoinGecko's crypto_price is absent because simple/price already
+# accepts many ids in one call.
+_FAN_OUT_ARGS = {
+    ("AlphaVantage", "stock_prices"): "symbol",
+    ("AlphaVantage", "company_overview"): "symbol",
+    ("AlphaVantage", "global_quote"): "symbol",
+    ("CoinGecko", "crypto_market_chart"): "ids",
+    ("ExchangeRate-API", "exchange_rate_convert"): "target_currency",
+}
+
+# Request builders receive the API's config entry, its resolved API key, a fresh copy of its default
+# params and the call's arguments, and return an error message or the request dict.
+FinanceRequestBuilder = Callable[[Dict[str, Any], Optional[str], Dict[str, Any], Dict[str, Any]], Union[str, Dict[str, Any]]]
+
+def _alphavantage_request(api_info: Dict[str, Any], api_key: Optional[str], params: Dict[str, Any], function_name: str, symbol: str) -> Dict[str, Any]:
+    """Builds an AlphaVantage request for one of the YAML 'functions' (e.g. TIME_SERIES_DAILY)."""
+    params.update(api_info['functions'][function_name]['params'])
+    params['symbol'] = symbol
+    if api_key: params[api_info.get("key_name")] = api_key # Add API key to params if available
+    return {"url": api_info.get("endpoint"), "headers": api_info.get("headers", {}), "params": params}
+
+def _alphavantage_symbol_builder(function_name: str) -> FinanceRequestBuilder:
+    """Returns the builder for an AlphaVantage data_type that takes a single 'symbol'."""
+    def build(api_info, api_key, params, args):
+        return _alphavantage_request(api_info, api_key, params, function_name, args["symbol"])
+    return build
+
+def _bulk_quotes_enabled(api_info: Dict[str, Any]) -> bool:
+    """True when the API config opts in to bulk quotes ('bulk_quotes: true') and defines REALTIME_BULK_QUOTES."""
+    return bool(api_info.get("bulk_quotes")) and 'REALTIME_BULK_QUOTES' in (api_info.get('functions') or {})
+
+def _alphavantage_global_quote(api_info, api_key, params, args):
+    symbols = _split_symbols(args["symbol"])
+    if len(symbols) > 1 and _bulk_quotes_enabled(api_info):
+        # A single bulk call returns quotes for all symbols
+        if len(symbols) > _MAX_BULK_QUOTE_SYMBOLS:
+            return f"Error: AlphaVantage bulk quotes accept at most {_MAX_BULK_QUOTE_SYMBOLS} symbols per call."
+        request = _alphavantage_request(api_info, api_key, params, 'REALTIME_BULK_QUOTES', ",".join(symbols))
+        return {**request, "key_rows_by": "symbol"}
+    return _alphavantage_request(api_info, api_key, params, 'GLOBAL_QUOTE', args["symbol"])
+
+def _coingecko_crypto_price(api_info, api_key, params, args):
+    params['ids'] = args["ids"]
+    params['vs_currencies'] = args["vs_currencies"]
+    return {"url": api_info["_url_templates"]["SIMPLE_PRICE"], "headers": api_info.get("headers", {}), "params": params}
+
+def _coingecko_crypto_list(api_info, api_key, params, args):
+    return {"url": api_info["_url_templates"]["COINS_LIST"], "headers": api_info.get("headers", {}), "params": params}
+
+def _coingecko_market_chart(api_info, api_key, params, args):
+    ids, vs_currencies, days = args["ids"], args["vs_currencies"], args["days"]
+    params['vs_currency'] = vs_currencies.split(',')[0].strip() # Use first vs_currency
+    params['days'] = str(days)
+    url = api_info["_url_templates"]["COINS_MARKET_CHART"].format_map({"id": ids.split(',')[0].strip()}) # Use first ID for path
+    return {"url": url, "headers": api_info.get("headers", {}), "params": params}
+
+def _exchangerate_latest(api_info, api_key, params, args):
+    url = api_info["_url_templates"]["LATEST"].format_map({"api_key": api_key, "base_currency": args["base_currency"].upper()})
+    return {"url": url, "headers": api_info.get("headers", {}), "params": None} # Everything is in the URL path
+
+def _exchangerate_convert(api_info, api_key, params, args):
+    base_currency, target_currency, amount = args["base_currency"], args["target_currency"], args["amount"]
+    url = api_info["_url_templates"]["PAIR_CONVERSION"].format_map({
+        "api_key": api_key, "base_currency": base_currency.upper(), "target_currency": target_currency.upper(), "amount": amount
+    })
+    return {"url": url, "headers": api_info.get("headers", {}), "params": None} # Everything is in the URL path
+
+# (api_name, data_type) -> request builder, so a call resolves its builder with a single lookup
+_FINANCE_REQUEST_DISPATCH: Dict[Tuple[str, str], FinanceRequestBuilder] = {
+    ("AlphaVantage", "stock_prices"): _alphavantage_symbol_builder("TIME_SERIES_DAILY"),
+    ("AlphaVantage", "company_overview"): _alphavantage_symbol_builder("COMPANY_OVERVIEW"),
+    ("AlphaVantage", "global_quote"): _alphavantage_global_quote,
+    ("CoinGecko", "crypto_price"): _coingecko_crypto_price,
+    ("CoinGecko", "crypto_list"): _coingecko_crypto_list,
+    ("CoinGecko", "crypto_market_chart"): _coingecko_market_chart,
+    ("ExchangeRate-API", "exchange_rate_latest"): _exchangerate_latest,
+    ("ExchangeRate-API", "exchange_rate_convert"): _exchangerate_convert,
+}
+_SUPPORTED_FINANCE_APIS = frozenset(api_name for api_name, _ in _FINANCE_REQUEST_DISPATCH)
+
+# Required arguments and the error returned when any is missing, by (api_name, data_type). The builders
+# above can rely on these being present, so each call is validated in one place with prebuilt messages.
+_REQUIRED_FETCH_ARGS: Dict[Tuple[str, str], Tuple[Tuple[str, ...], str]] = {
+    ("AlphaVantage", "stock_prices"): (("symbol",), "Error: 'symbol' is required for AlphaVantage stock_prices."),
+    ("AlphaVantage", "company_overview"): (("symbol",), "Error: 'symbol' is required for AlphaVantage company_overview."),
+    ("AlphaVantage", "global_quote"): (("symbol",), "Error: 'symbol' is required for AlphaVantage global_quote."),
+    ("CoinGecko", "crypto_price"): (("ids", "vs_currencies"), "Error: 'ids' (e.g., 'bitcoin') and 'vs_currencies' (e.g., 'usd') are required for CoinGecko crypto_price."),
+    ("CoinGecko", "crypto_market_chart"): (("ids", "vs_currencies", "days"), "Error: 'ids', 'vs_currencies', and 'days' are required for CoinGecko crypto_market_chart."),
+    ("ExchangeRate-API", "exchange_rate_latest"): (("base_currency",), "Error: 'base_currency' is required for ExchangeRate-API latest rates."),
+    ("ExchangeRate-API", "exchange_rate_convert"): (("base_currency", "target_currency", "amount"), "Error: 'base_currency', 'target_currency', and 'amount' are required for conversion."),
+}
+
+def _missing_fetch_arg(api_name: str, data_type: str, args: Dict[str, Any]) -> Optional[str]:
+    """Returns the error message if a required argument is missing, else None. An `amount` of 0 counts as given."""
+    required_args, error_message = _REQUIRED_FETCH_ARGS.get((api_name, data_type), ((), None))
+    for name in required_args:
+        value = args.get(name)
+        if (value is None) if name == "amount" else (not value):
+            return error_message
+    return None
+
+def _build_finance_request(
+    api_name: str,
+    data_type: str,
+    symbol: Optional[str] = None,
+    base_currency: Optional[str] = None,
+    target_currency: Optional[str] = None,
+    amount: Optional[float] = None,
+    ids: Optional[str] = None,
+    vs_currencies: Optional[str] = None,
+    days: Optional[int] = None
+) -> Union[str, Dict[str, Any]]:
+    """
+    Validates the arguments for a single finance API call and builds the request for it.
+
+    Returns:
+        Union[str, Dict[str, Any]]: An error message, or a dict with the request's 'url', 'headers' and 'params'.
+    """
+    api_info = _load_finance_apis().get(api_name)
+    if not api_info:
+        return f"Error: API '{api_name}' not found in data/finance_apis.yaml configuration."
+
+    build = _FINANCE_REQUEST_DISPATCH.get((api_name, data_type))
+    if build is None:
+        if api_name in _SUPPORTED_FINANCE_APIS:
+            return f"Error: Unsupported data_type '{data_type}' for {api_name}."
+        return f"Error: API '{api_name}' is not supported by finance_data_fetcher."
+
+    args = {
+        "symbol": symbol, "base_currency": base_currency, "target_currency": target_currency,
+        "amount": amount, "ids": ids, "vs_currencies": vs_currencies, "days": days
+    }
+    missing_arg_error = _missing_fetch_arg(api_name, data_type, args)
+    if missing_arg_error:
+        return missing_arg_error
+
+    key_name = api_info.get("key_name")
+    api_key = api_info.get("_resolved_key") # Resolved from secrets.toml when the config was loaded
+
+    # For APIs where key is part of URL path (like ExchangeRate-API)
+    if api_name == "ExchangeRate-API" and not api_key:
+        return f"Error: API key for '{api_name}' not found in secrets.toml. It's required for this API."
+    elif key_name and not api_key: # For APIs where key is a param/header
+        logger.warning("API key for '%s' not found in secrets.toml. Proceeding without key if API allows.", api_name)
+
+    try:
+        return build(api_info, api_key, {**api_info.get("default_params", {})}, args) # Start with default parameters
+    except Exception as e:
+        logger.error("Error setting up %s request: %s", api_name, e, exc_info=True)
+        return f"An unexpected error occurred: {e}"
+
+# Large list payloads that are parsed incrementally when a `limit` is given, by (api_name, data_type):
+# the key of the list (None for a bare list), which the items are returned under (see LimitedItemsParser).
+_STREAMED_ITEMS = {
+    ("CoinGecko", "crypto_list"): None, # ~13k coin records
+    ("CoinGecko", "crypto_market_chart"): "prices", # One [timestamp, price] pair per interval
+}
+
+def _build_finance_requests(
+    api_name: str,
+    data_type: str,
+    symbol: Optional[str] = None,
+    limit: Optional[int] = None,
+    bulk_quotes: bool = True,
+    **kwargs
+) -> Union[str, Dict[Optional[str], Dict[str, Any]]]:
+    """
+    Builds the requests for a finance_data_fetcher call. A comma-separated list in the argument
+    named by `_FAN_OUT_ARGS` (an AlphaVantage `symbol`, CoinGecko market-chart `ids` or ExchangeRate-API
+    `target_currency`) becomes one request per item, keyed by item, unless the API has bulk quotes
+    enabled for `data_type` (pass bulk_quotes=False to fan out anyway); otherwise the single request
+    is keyed by None. With a `limit`, requests
+    for the `_STREAMED_ITEMS` payloads are marked to be streamed and cut after `limit` items.
+
+    Returns:
+        Union[str, Dict[Optional[str], Dict[str, Any]]]: The first error message encountered, or the requests.
+    """
+    args = {"symbol": symbol, **kwargs}
+    fan_out_arg = _FAN_OUT_ARGS.get((api_name, data_type))
+    has_bulk_quotes = bulk_quotes and data_type == "global_quote" and _bulk_quotes_enabled(_load_finance_apis().get(api_name, {}))
+    items = _split_symbols(args[fan_out_arg]) if fan_out_arg and not has_bulk_quotes else []
+    if len(items) > 1:
+        requests_by_symbol = {item: _build_finance_request(api_name, data_type, **{**args, fan_out_arg: item}) for item in items}
+    else:
+        requests_by_symbol = {None: _build_finance_request(api_name, data_type, **args)}
+
+    for built in requests_by_symbol.values():
+        if isinstance(built, str):
+            return built
+    if limit and (api_name, data_type) in _STREAMED_ITEMS:
+        for built in requests_by_symbol.values():
+            built["stream_items"] = (_STREAMED_ITEMS[(api_name, data_type)], limit)
+    return requests_by_symbol
+
+def _dump_json(data: Any) -> str:
+    """Serializes fetched data for the agent with orjson (non-string keys, e.g. numeric ids, are allowed)."""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+def _key_rows(request: Dict[str, Any], data: Any) -> Any:
+    """Re-keys the rows of a bulk response (e.g. bulk quotes) by symbol so they can be looked up directly."""
+    key = request.get("key_rows_by")
+    if key and isinstance(data, dict) and isinstance(data.get("data"), list):
+        return {row.get(key): row for row in data["data"]}
+    return data
+
+def _decode_body(request: Dict[str, Any], body: bytes) -> Tuple[Any, Optional[str]]:
+    """
+    Decodes a finance API response body. Returns the data and, when the data is the body unchanged
+    (no re-keying), the body's own JSON text so it can be forwarded without a re-encode.
+    """
+    data = orjson.loads(body)
+    if request.get("key_rows_by"):
+        return _key_rows(request, data), None
+    return data, body.decode("utf-8")
+
+async def _afetch_json(client: "httpx.AsyncClient", request: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+    """Sends one finance API request on the async client and returns the decoded JSON body (see `_decode_body`)."""
+    if "stream_items" in request:
+        # Stream the body and stop reading once `limit` items are parsed
+        parser = LimitedItemsParser(*request["stream_items"])
+        async with client.stream("GET", request["url"], headers=request["headers"], params=request["params"]) as response:
+            if response.is_error:
+                await response.aread() # Load the error body so it can be reported
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if parser.feed(chunk):
+                    break
+        return parser.result(), None
+
+    response = await client.get(request["url"], headers=request["headers"], params=request["params"])
+    response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+    return _decode_body(request, response.content)
+
+def _async_finance_client() -> "httpx.AsyncClient":
+    """
+    Creates an HTTP/2 async client for finance API calls. A client is tied to the event loop it
+    was created on, so callers open one per run_async/ainvoke call and close it when done.
+    """
+    import httpx
+
+    timeout = httpx.Timeout(_read_timeout(), connect=_CONNECT_TIMEOUT_SECONDS)
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    return httpx.AsyncClient(http2=True, timeout=timeout, limits=limits)
+
+async def _gather_finance_fetches(
+    api_name: str,
+    data_type: str,
+    requests_by_symbol: Dict[Optional[str], Dict[str, Any]],
+    client: Optional["httpx.AsyncClient"] = None
+) -> Tuple[str, Any, bool]:
+    """
+    Sends all requests concurrently and returns their JSON, keyed by symbol when there are several.
+    A failed item is reported as an error message under its symbol; the other items are kept.
+    Uses `client` when given (e.g. shared across a batch); otherwise opens one for this call.
+
+    Returns:
+        Tuple[str, Any, bool]: The JSON string (or an error message), the decoded data (None when
+                               every request failed) and whether every request succeeded.
+    """
+    if client is None:
+        async with _async_finance_client() as client:
+            return await _gather_finance_fetches(api_name, data_type, requests_by_symbol, client)
+
+    # Space the requests out to the API's rate limit, reserving the tokens for the whole fan-out at
+    # once so it isn't interleaved with other calls; the items no token is left for fail on their own.
+    # The in-flight requests are bounded too, so a long list of symbols/coins doesn't come back as 429s.
+    semaphore = asyncio.Semaphore(_MAX_CONCURRENT_FAN_OUT)
+    rate_limiter = _rate_limiter(api_name)
+    if rate_limiter is None:
+        waits = [0.0] * len(requests_by_symbol)
+    else:
+        waits = rate_limiter.reserve(len(requests_by_symbol))
+
+    async def fetch_bounded(request: Dict[str, Any], wait: float) -> Any:
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                rate_limiter.refund()
+                raise
+        async with semaphore:
+            return await _afetch_json(client, request)
+
+    fetches = [fetch_bounded(request, wait) for request, wait in zip(requests_by_symbol.values(), waits)]
+    results = await asyncio.gather(*fetches, return_exceptions=True)
+    if len(waits) < len(requests_by_symbol):
+        results += [rate_limiter.exceeded()] * (len(requests_by_symbol) - len(waits))
+
+    if None in requests_by_symbol:
+        if isinstance(results[0], BaseException):
+            return _fetch_error_message(api_name, data_type, results[0]), None, False
+        data, raw_json = results[0]
+        return raw_json if raw_json is not None else _dump_json(data), data, not _streamed_list_missing(requests_by_symbol[None], data)
+
+    data = {
+        symbol: _fetch_error_message(api_name, data_type, result) if isinstance(result, BaseException) else result[0]
+        for symbol, result in zip(requests_by_symbol, results)
+    }
+    failed = sum(isinstance(result, BaseException) for result in results)
+    if failed == len(results):
+        return _dump_json(data), None, False
+    complete = failed == 0 and not any(_streamed_list_missing(requests_by_symbol[symbol], data[symbol]) for symbol in requests_by_symbol)
+    return _dump_json(data), data, complete
+
+def _fetch_error_message(api_name: str, data_type: str, error: BaseException) -> str:
+    """Logs a failed async finance API request and returns the error message reported for it."""
+    import httpx
+
+    if isinstance(error, _RateLimitExceeded):
+        logger.warning("API request for %s (%s) not sent: %s", api_name, data_type, error)
+        return f"API request for {api_name} not sent: {error}"
+    if isinstance(error, httpx.HTTPStatusError):
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, error)
+        error_body = error.response.text[:_MAX_ERROR_BODY_CHARS]
+        logger.error("Response content: %s", error_body)
+        return f"API request failed for {api_name}: {error_body}"
+    if isinstance(error, httpx.HTTPError):
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, error)
+        return f"API request failed for {api_name}: {error}"
+    logger.error("Error processing %s response or request setup: %s", api_name, error, exc_info=error)
+    return f"An unexpected error occurred: {error}"
+
+def _send_http2_finance_request(api_name: str, data_type: str, request: Dict[str, Any]) -> Tuple[str, Any]:
+    """
+    Sends a single finance API request on the shared HTTP/2 client (see `_send_finance_request`).
+
+    Returns:
+        Tuple[str, Any]: The JSON string (or an error message) and the decoded data (None on error).
+    """
+    import httpx
+
+    request_timeout = httpx.Timeout(_read_timeout(), connect=_CONNECT_TIMEOUT_SECONDS)
+    raw_json = None
+    try:
+        rate_limiter = _rate_limiter(api_name)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        if "stream_items" in request:
+            # Stream the body and stop reading once `limit` items are parsed
+            parser = LimitedItemsParser(*request["stream_items"])
+            with _http2_client().stream("GET", request["url"], headers=request["headers"], params=request["params"], timeout=request_timeout) as response:
+                if response.is_error:
+                    response.read() # Load the error body so it can be reported
+                response.raise_for_status()
+                for chunk in response.iter_bytes():
+                    if parser.feed(chunk):
+                        break
+            data = parser.result()
+        else:
+            response = _http2_client().get(request["url"], headers=request["headers"], params=request["params"], timeout=request_timeout)
+            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+            data, raw_json = _decode_body(request, response.content)
+    except _RateLimitExceeded as e:
+        logger.warning("API request for %s (%s) not sent: %s", api_name, data_type, e)
+        return f"API request for {api_name} not sent: {e}", None
+    except httpx.HTTPStatusError as e:
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, e)
+        error_body = e.response.text[:_MAX_ERROR_BODY_CHARS]
+        logger.error("Response content: %s", error_body)
+        return f"API request failed for {api_name}: {error_body}", None
+    except httpx.HTTPError as e:
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, e)
+        return f"API request failed for {api_name}: {e}", None
+    except Exception as e:
+        logger.error("Error processing %s response or request setup: %s", api_name, e, exc_info=True)
+        return f"An unexpected error occurred: {e}", None
+
+    return raw_json if raw_json is not None else _dump_json(data), data
+
+def _send_finance_request(api_name: str, data_type: str, request: Dict[str, Any]) -> Tuple[str, Any]:
+    """
+    Sends a single finance API request on the pooled session, or on the shared HTTP/2 client for APIs
+    marked `http2: true` in finance_apis.yaml.
+
+    Returns:
+        Tuple[str, Any]: The JSON string (or an error message) and the decoded data (None on error).
+    """
+    if _load_finance_apis().get(api_name, {}).get("http2"):
+        return _send_http2_finance_request(api_name, data_type, request)
+
+    request_timeout = (_CONNECT_TIMEOUT_SECONDS, _read_timeout())
+    raw_json = None
+    try:
+        rate_limiter = _rate_limiter(api_name)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        if "stream_items" in request:
+            # Stream the body and stop reading once `limit` items are parsed
+            parser = LimitedItemsParser(*request["stream_items"])
+            with _http_session().get(request["url"], headers=request["headers"], params=request["params"], timeout=request_timeout, stream=True) as response:
+                if not response.ok:
+                    response.content # Load the error body so it can be reported
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=65536):
+                    if parser.feed(chunk):
+                        break
+            data = parser.result()
+        else:
+            response = _http_session().get(request["url"], headers=request["headers"], params=request["params"], timeout=request_timeout)
+            response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
+            data, raw_json = _decode_body(request, response.content)
+    except _RateLimitExceeded as e:
+        logger.warning("API request for %s (%s) not sent: %s", api_name, data_type, e)
+        return f"API request for {api_name} not sent: {e}", None
+    except requests.exceptions.RequestException as req_e:
+        logger.error("API request failed for %s (%s): %s", api_name, data_type, req_e)
+        if hasattr(req_e, 'response') and req_e.response is not None:
+            error_body = req_e.response.text[:_MAX_ERROR_BODY_CHARS]
+            logger.error("Response content: %s", error_body)
+            return f"API request failed for {api_name}: {error_body}", None
+        return f"API request failed for {api_name}: {req_e}", None
+    except Exception as e:
+        logger.error("Error processing %s response or request setup: %s", api_name, e, exc_info=True)
+        return f"An unexpected error occurred: {e}", None
+
+    # Forward the API's own JSON text when the data is unchanged; only re-keyed or cut data is re-encoded
+    return raw_json if raw_json is not None else _dump_json(data), data
+
+def _bulk_quotes_missing(requests_by_symbol: Dict[Optional[str], Dict[str, Any]], data: Any) -> bool:
+    """
+    True when a bulk-quote request came back without quote rows, e.g. with AlphaVantage's 'Information'
+    notice for a key that has no access to the premium endpoint. The rows of a successful response are
+    keyed by the requested symbols (see `_key_rows`); anything else means the bulk call didn't work.
+    """
+    request = requests_by_symbol.get(None)
+    if data is None or not request or not request.get("key_rows_by"):
+        return False
+    requested = {symbol.upper() for symbol in _split_symbols(request["params"].get("symbol"))}
+    return not (isinstance(data, dict) and data and {str(key).upper() for key in data} <= requested)
+
+def _send_built_requests(api_name: str, data_type: str, requests_by_symbol: Dict[Optional[str], Dict[str, Any]]) -> Tuple[str, Any, bool]:
+    """
+    Sends the requests from `_build_finance_requests`: a fan-out concurrently, a single request on the
+    pooled session. Returns the content, the data and whether every request succeeded.
+    """
+    if len(requests_by_symbol) > 1:
+        # Fan the per-symbol requests out concurrently instead of fetching them one by one
+        return run_async(_gather_finance_fetches(api_name, data_type, requests_by_symbol))
+    request = next(iter(requests_by_symbol.values()))
+    content, data = _send_finance_request(api_name, data_type, request)
+    return content, data, data is not None and not _streamed_list_missing(request, data)
+
+def _streamed_list_missing(request: Dict[str, Any], data: Any) -> bool:
+    """
+    True for a streamed response without the expected list (e.g. an error object). LimitedItemsParser
+    returns such a body as is; it is not cached, so the next call asks the API again.
+    """
+    return "stream_items" in request and find_list(data, request["stream_items"][0]) is None
+
+def _fetch_cache_key(api_name: str, data_type: str, call_args: Dict[str, Any]) -> Tuple:
+    return (api_name, data_type, tuple(sorted(call_args.items())))
+
+def _cache_fetch(cache_key: Tuple, result: Tuple[str, Any, bool]) -> Tuple[str, Any]:
+    """
+    Caches the content of a fetch result in which every request succeeded and returns its (content, data).
+    Results with a failed request (even if other items succeeded) are not cached, so they can be retried.
+    Only the JSON string is cached, so no decoded object is shared between callers.
+    """
+    content, data, complete = result
+    if complete and data is not None:
+        _cache_put(_FETCH_CACHE, cache_key, content)
+    return content, data
+
+def _cached_fetch(cache_key: Tuple, data_type: str, summarize: bool) -> Optional[str]:
+    """Returns the cached content for `cache_key` (summarized as in `_summarize_fetch`), or None on a miss."""
+    cached = _cache_get(_FETCH_CACHE, cache_key)
+    if cached is None or not summarize or data_type != "crypto_market_chart":
+        return cached
+    return _summarize_fetch(data_type, cached, orjson.loads(cached), summarize)
+
+def _utc_iso(timestamp_ms: float) -> str:
+    return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).isoformat(timespec="seconds")
+
+def _market_chart_summary(chart: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduces one CoinGecko market chart to summary figures, computed with vectorized NumPy over the
+    [timestamp_ms, price] pairs: range, change, simple-return mean/std and the maximum drawdown.
+    """
+    import numpy as np
+
+    points = np.asarray(chart.get("prices") or [], dtype=np.float64).reshape(-1, 2)
+    if points.shape[0] < 2:
+        return {"points": int(points.shape[0]), "error": "at least two prices are needed for a summary"}
+    timestamps, prices = points[:, 0], points[:, 1]
+    returns = np.diff(prices) / prices[:-1]
+    running_peak = np.maximum.accumulate(prices)
+    drawdowns = (running_peak - prices) / running_peak
+    trough = int(np.argmax(drawdowns))
+    return {
+        "points": int(prices.shape[0]),
+        "start": _utc_iso(timestamps[0]),
+        "end": _utc_iso(timestamps[-1]),
+        "first_price": float(prices[0]),
+        "last_price": float(prices[-1]),
+        "change_pct": float((prices[-1] / prices[0] - 1.0) * 100.0),
+        "min_price": float(prices.min()),
+        "max_price": float(prices.max()),
+        "mean_price": float(prices.mean()),
+        "return_mean": float(returns.mean()),
+        "return_std": float(returns.std(ddof=1)) if returns.shape[0] > 1 else None,
+        "max_drawdown": float(drawdowns[trough]),
+        "max_drawdown_at": _utc_iso(timestamps[trough]),
+    }
+
+def _summarize_fetch(data_type: str, content: str, data: Any, summarize: bool) -> str:
+    """
+    Replaces the content of a successful crypto_market_chart fetch with its summary (per coin when
+    several ids were fetched) when `summarize` is set.
+    """
+    if not summarize or data_type != "crypto_market_chart" or data is None:
+        return content
+    if "prices" in data:
+        return _dump_json(_market_chart_summary(data))
+    # Coins whose request failed keep their error message
+    summaries = {coin_id: _market_chart_summary(chart) if isinstance(chart, dict) else chart for coin_id, chart in data.items()}
+    return _dump_json(summaries)
 
 @tool
 def finance_data_fetcher(
@@ -135,7 +1150,9 @@ def finance_data_fetcher(
     days: Optional[int] = None, # For crypto market chart
     start_date: Optional[str] = None, # YYYY-MM-DD
     end_date: Optional[str] = None, # YYYY-MM-DD
-    limit: Optional[int] = None # For number of records
+    limit: Optional[int] = None, # For number of records
+    bypass_cache: bool = False,
+    summarize: bool = False # For crypto market chart
 ) -> str:
     """
     Fetches financial data from configured APIs (AlphaVantage, CoinGecko, ExchangeRate-API).
@@ -148,128 +1165,251 @@ def finance_data_fetcher(
                           - For CoinGecko: "crypto_price", "crypto_list", "crypto_market_chart".
                           - For ExchangeRate-API: "exchange_rate_latest", "exchange_rate_convert".
         symbol (str, optional): Stock symbol (e.g., "AAPL", "MSFT") for AlphaVantage.
+                                Pass several comma-separated symbols (e.g., "AAPL,MSFT") in one call when comparing
+                                or aggregating; the result is a JSON object keyed by symbol, in which a
+                                symbol whose request failed maps to its error message.
         base_currency (str, optional): Base currency for exchange rates (e.g., "USD", "EUR").
         target_currency (str, optional): Target currency for exchange rates (e.g., "GBP", "JPY").
+                                         Several comma-separated targets for exchange_rate_convert return a JSON object keyed by currency.
         amount (float, optional): Amount to convert for exchange rates.
         ids (str, optional): Comma-separated crypto coin IDs (e.g., "bitcoin,ethereum") for CoinGecko.
+                             Several ids for crypto_market_chart return a JSON object keyed by id.
         vs_currencies (str, optional): Comma-separated currency symbols (e.g., "usd,eur") for CoinGecko.
         days (int, optional): Number of days for crypto market chart (e.g., 1, 7, 30).
         start_date (str, optional): Start date for time-series data (YYYY-MM-DD). Not fully implemented for all APIs.
         end_date (str, optional): End date for time-series data (YYYY-MM-DD). Not fully implemented for all APIs.
-        limit (int, optional): Maximum number of records to return.
+        limit (int, optional): Maximum number of records to return. For CoinGecko's crypto_list and
+                               crypto_market_chart (prices only) the response is streamed and cut after `limit` items.
+        bypass_cache (bool): Fetch from the API even if a recent response is cached (e.g., when the user
+                             explicitly asks for a refresh). Defaults to False.
+        summarize (bool): For crypto_market_chart, return summary figures (price range and change, return
+                          mean/std, maximum drawdown) instead of the raw price points. Defaults to False.
         
     Returns:
-        str: A JSON string of the fetched data or an error message.
+        str: A JSON string of the fetched data (or of its summary) or an error message.
              The agent can then use `python_interpreter_with_rbac` to parse and analyze this JSON.
     """
-    logger.info(f"Tool: finance_data_fetcher called for API: {api_name}, data_type: {data_type}, symbol: {symbol}, ids: {ids}, base_currency: {base_currency}")
+    logger.info("Tool: finance_data_fetcher called for API: %s, data_type: %s, symbol: %s, ids: %s, base_currency: %s", api_name, data_type, symbol, ids, base_currency)
 
-    api_info = FINANCE_APIS_CONFIG.get(api_name)
-    if not api_info:
-        return f"Error: API '{api_name}' not found in data/finance_apis.yaml configuration."
+    call_args = dict(
+        symbol=symbol, base_currency=base_currency, target_currency=target_currency,
+        amount=amount, ids=ids, vs_currencies=vs_currencies, days=days, limit=limit
+    )
+    cache_key = _fetch_cache_key(api_name, data_type, call_args)
+    cached = None if bypass_cache else _cached_fetch(cache_key, data_type, summarize)
+    if cached is not None:
+        return cached
 
-    endpoint = api_info.get("endpoint")
-    key_name = api_info.get("key_name")
-    api_key_value_ref = api_info.get("key_value")
-    default_params = api_info.get("default_params", {})
-    headers = api_info.get("headers", {})
-    request_timeout = config_manager.get('web_scraping.timeout_seconds', 10)
-
-    api_key = None
-    if api_key_value_ref and api_key_value_ref.startswith("load_from_secrets."):
-        secret_key_path = api_key_value_ref.split("load_from_secrets.")[1]
-        api_key = config_manager.get_secret(secret_key_path)
+    requests_by_symbol = _build_finance_requests(api_name, data_type, **call_args)
+    if isinstance(requests_by_symbol, str):
+        return requests_by_symbol
+    result = _send_built_requests(api_name, data_type, requests_by_symbol)
+    if _bulk_quotes_missing(requests_by_symbol, result[1]):
+        logger.warning("Bulk quotes unavailable for %s; fetching the symbols one by one.", api_name)
+        requests_by_symbol = _build_finance_requests(api_name, data_type, bulk_quotes=False, **call_args)
+        if isinstance(requests_by_symbol, str):
+            return requests_by_symbol
+        result = _send_built_requests(api_name, data_type, requests_by_symbol)
+    content, data = _cache_fetch(cache_key, result)
+    return _summarize_fetch(data_type, content, data, summarize)
+
+async def _afinance_data_fetcher(
+    api_name: str,
+    data_type: str,
+    symbol: Optional[str] = None,
+    base_currency: Optional[str] = None,
+    target_currency: Optional[str] = None,
+    amount: Optional[float] = None,
+    ids: Optional[str] = None,
+    vs_currencies: Optional[str] = None,
+    days: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    bypass_cache: bool = False,
+    summarize: bool = False
+) -> str:
+    """Async implementation of `finance_data_fetcher`, used when the agent runs via ainvoke/astream."""
+    logger.info("Tool: finance_data_fetcher (async) called for API: %s, data_type: %s, symbol: %s, ids: %s, base_currency: %s", api_name, data_type, symbol, ids, base_currency)
+
+    call_args = dict(
+        symbol=symbol, base_currency=base_currency, target_currency=target_currency,
+        amount=amount, ids=ids, vs_currencies=vs_currencies, days=days, limit=limit
+    )
+    return await _afetch_finance_data(api_name, data_type, call_args, bypass_cache=bypass_cache, summarize=summarize)
+
+finance_data_fetcher.coroutine = _afinance_data_fetcher
+
+async def _afetch_finance_data(
+    api_name: str,
+    data_type: str,
+    call_args: Dict[str, Any],
+    client: Optional["httpx.AsyncClient"] = None,
+    bypass_cache: bool = False,
+    summarize: bool = False
+) -> str:
+    """
+    Serves one fetch from the response cache or the network.
+    With `summarize`, a market chart's content is its summary (see `_summarize_fetch`).
+
+    Returns:
+        str: The JSON string or an error message.
+    """
+    cache_key = _fetch_cache_key(api_name, data_type, call_args)
+    cached = None if bypass_cache else _cached_fetch(cache_key, data_type, summarize)
+    if cached is not None:
+        return cached
+
+    requests_by_symbol = _build_finance_requests(api_name, data_type, **call_args)
+    if isinstance(requests_by_symbol, str):
+        return requests_by_symbol
+    result = await _gather_finance_fetches(api_name, data_type, requests_by_symbol, client)
+    if _bulk_quotes_missing(requests_by_symbol, result[1]):
+        logger.warning("Bulk quotes unavailable for %s; fetching the symbols one by one.", api_name)
+        requests_by_symbol = _build_finance_requests(api_name, data_type, bulk_quotes=False, **call_args)
+        if isinstance(requests_by_symbol, str):
+            return requests_by_symbol
+        result = await _gather_finance_fetches(api_name, data_type, requests_by_symbol, client)
+    content, data = _cache_fetch(cache_key, result)
+    return _summarize_fetch(data_type, content, data, summarize)
+
+# The finance_data_fetcher arguments a batch request may carry besides api_name and data_type
+_BATCH_FETCH_ARGS = ("symbol", "base_currency", "target_currency", "amount", "ids", "vs_currencies", "days", "limit")
+
+@tool
+def finance_data_fetcher_batch(fetches: List[Dict[str, Any]]) -> str:
+    """
+    Runs several finance_data_fetcher requests concurrently in a single call, across any mix of APIs.
+    Use this instead of calling `finance_data_fetcher` repeatedly when one question needs data from
+    several sources (e.g., a stock quote, a crypto price and an exchange rate).
     
-    # For APIs where key is part of URL path (like ExchangeRate-API)
-    if api_name == "ExchangeRate-API" and not api_key:
-        return f"Error: API key for '{api_name}' not found in secrets.toml. It's required for this API."
-    elif key_name and not api_key: # For APIs where key is a param/header
-        logger.warning(f"API key for '{api_name}' not found in secrets.toml. Proceeding without key if API allows.")
+    Args:
+        fetches (List[Dict[str, Any]]): The requests, each a dict with 'api_name' and 'data_type' plus the
+                                        finance_data_fetcher arguments it needs (e.g., 'symbol', 'ids',
+                                        'vs_currencies', 'base_currency', 'target_currency', 'amount', 'days',
+                                        'limit', 'bypass_cache', 'summarize').
+    
+    Returns:
+        str: The result of each request (JSON or an error message), in the order given.
+    """
+    logger.info("Tool: finance_data_fetcher_batch called with %d requests", len(fetches))
+    return run_async(_afinance_data_fetcher_batch(fetches))
 
+async def _afinance_data_fetcher_batch(fetches: List[Dict[str, Any]]) -> str:
+    """Async implementation of `finance_data_fetcher_batch`; all requests share one HTTP/2 client."""
+    if not fetches:
+        return "Error: 'fetches' must contain at least one request."
 
-    params = {**default_params} # Start with default parameters
+    async def fetch_one(fetch: Dict[str, Any]) -> str:
+        if not fetch.get("api_name") or not fetch.get("data_type"):
+            return "Error: each request needs 'api_name' and 'data_type'."
+        call_args = {name: fetch.get(name) for name in _BATCH_FETCH_ARGS}
+        return await _afetch_finance_data(
+            fetch["api_name"], fetch["data_type"], call_args, client,
+            bypass_cache=bool(fetch.get("bypass_cache")), summarize=bool(fetch.get("summarize"))
+        )
 
-    try:
-        # --- AlphaVantage ---
-        if api_name == "AlphaVantage":
-            if data_type == "stock_prices":
-                if not symbol: return "Error: 'symbol' is required for AlphaVantage stock_prices."
-                params.update(api_info['functions']['TIME_SERIES_DAILY']['params'])
-                params['symbol'] = symbol
-            elif data_type == "company_overview":
-                if not symbol: return "Error: 'symbol' is required for AlphaVantage company_overview."
-                params.update(api_info['functions']['COMPANY_OVERVIEW']['params'])
-                params['symbol'] = symbol
-            elif data_type == "global_quote":
-                if not symbol: return "Error: 'symbol' is required for AlphaVantage global_quote."
-                params.update(api_info['functions']['GLOBAL_QUOTE']['params'])
-                params['symbol'] = symbol
-            else:
-                return f"Error: Unsupported data_type '{data_type}' for AlphaVantage."
-            
-            if api_key: params[key_name] = api_key # Add API key to params if available
-            response = requests.get(endpoint, headers=headers, params=params, timeout=request_timeout)
-
-        # --- CoinGecko ---
-        elif api_name == "CoinGecko":
-            if data_type == "crypto_price":
-                if not ids or not vs_currencies: return "Error: 'ids' (e.g., 'bitcoin') and 'vs_currencies' (e.g., 'usd') are required for CoinGecko crypto_price."
-                url = f"{endpoint}{api_info['functions']['SIMPLE_PRICE']['path']}"
-                params['ids'] = ids
-                params['vs_currencies'] = vs_currencies
-            elif data_type == "crypto_list":
-                url = f"{endpoint}{api_info['functions']['COINS_LIST']['path']}"
-            elif data_type == "crypto_market_chart":
-                if not ids or not vs_currencies or not days: return "Error: 'ids', 'vs_currencies', and 'days' are required for CoinGecko crypto_market_chart."
-                url = f"{endpoint}coins/{ids.split(',')[0].strip()}/market_chart" # Use first ID for path
-                params['vs_currency'] = vs_currencies.split(',')[0].strip() # Use first vs_currency
-                params['days'] = str(days)
-            else:
-                return f"Error: Unsupported data_type '{data_type}' for CoinGecko."
-            
-            response = requests.get(url, headers=headers, params=params, timeout=request_timeout)
-
-        # --- ExchangeRate-API ---
-        elif api_name == "ExchangeRate-API":
-            if not api_key: return "Error: API key is required for ExchangeRate-API."
-            if data_type == "exchange_rate_latest":
-                if not base_currency: return "Error: 'base_currency' is required for ExchangeRate-API latest rates."
-                url = f"{endpoint}{api_key}/latest/{base_currency.upper()}"
-            elif data_type == "exchange_rate_convert":
-                if not base_currency or not target_currency or amount is None: return "Error: 'base_currency', 'target_currency', and 'amount' are required for conversion."
-                url = f"{endpoint}{api_key}/pair/{base_currency.upper()}/{target_currency.upper()}/{amount}"
-            else:
-                return f"Error: Unsupported data_type '{data_type}' for ExchangeRate-API."
-            
-            response = requests.get(url, headers=headers, timeout=request_timeout) # Params might not be needed if all in URL
+    async with _async_finance_client() as client:
+        results = await asyncio.gather(*(fetch_one(fetch) for fetch in fetches))
 
-        else:
-            return f"Error: API '{api_name}' is not supported by finance_data_fetcher."
+    return "\n\n".join(
+        f"Result {i} ({fetch.get('api_name')} {fetch.get('data_type')}):\n{result}"
+        for i, (fetch, result) in enumerate(zip(fetches, results), start=1)
+    )
 
-        response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-        data = response.json()
-        return json.dumps(data, ensure_ascii=False, indent=2)
+finance_data_fetcher_batch.coroutine = _afinance_data_fetcher_batch
 
-    except requests.exceptions.RequestException as req_e:
-        logger.error(f"API request failed for {api_name} ({data_type}): {req_e}")
-        if hasattr(req_e, 'response') and req_e.response is not None:
-            logger.error(f"Response content: {req_e.response.text}")
-            return f"API request failed for {api_name}: {req_e.response.text}"
-        return f"API request failed for {api_name}: {req_e}"
-    except Exception as e:
-        logger.error(f"Error processing {api_name} response or request setup: {e}", exc_info=True)
-        return f"An unexpected error occurred: {e}"
+# Operations supported by finance_timeseries_analyze
+_TIMESERIES_OPS = ("returns", "rolling_mean", "rolling_std", "zscore", "ema", "max_drawdown")
+
+def _extract_price_series(data: Any) -> Union[str, List[float]]:
+    """
+    Pulls a single price series, oldest first, out of a finance_data_fetcher payload: an AlphaVantage
+    time series (closing prices), a CoinGecko market chart ('prices') or a plain list of numbers.
+
+    Returns:
+        Union[str, List[float]]: The prices, or an error message if no single series is found.
+    """
+    if isinstance(data, list):
+        return [float(value) for value in data]
+    if isinstance(data, dict):
+        if isinstance(data.get("prices"), list):
+            return [float(point[1]) for point in data["prices"]]
+        series_key = next((key for key in data if key.startswith("Time Series")), None)
+        if series_key:
+            # Dates are ISO strings, so sorting the keys orders the bars oldest first
+            rows = data[series_key]
+            return [float(rows[day].get("4. close", next(iter(rows[day].values())))) for day in sorted(rows)]
+    return "Error: expected an AlphaVantage time series, a CoinGecko market chart or a list of prices for a single symbol."
+
+def _latest(series: "np.ndarray") -> Optional[float]:
+    """Returns the last value of a rolling statistic, or None while the window is still filling (NaN)."""
+    value = float(series[-1])
+    return None if value != value else value
+
+@tool
+def finance_timeseries_analyze(data_json: str, ops: List[str], window: int = 20) -> str:
+    """
+    Computes common time-series statistics on a price series with compiled numeric kernels.
+    Use this for moving averages, volatility, z-scores, returns and drawdowns of fetched prices
+    instead of writing the equivalent pandas code in the Python interpreter.
+    
+    Args:
+        data_json (str): The JSON from `finance_data_fetcher` for ONE symbol or coin (AlphaVantage
+                         stock_prices or CoinGecko crypto_market_chart), or a JSON list of prices, oldest first.
+        ops (List[str]): The statistics to compute: "returns", "rolling_mean", "rolling_std", "zscore"
+                         (latest price vs. its rolling mean/std), "ema" or "max_drawdown".
+        window (int): Window length for the rolling statistics and span for "ema". Defaults to 20.
+    
+    Returns:
+        str: A JSON object with the value of each statistic at the latest point (and summary figures for "returns").
+    """
+    logger.info("Tool: finance_timeseries_analyze called with ops: %s, window: %d", ops, window)
+    unknown_ops = [op for op in ops if op not in _TIMESERIES_OPS]
+    if unknown_ops:
+        return f"Error: Unsupported ops {unknown_ops}. Supported ops: {', '.join(_TIMESERIES_OPS)}."
+    if window < 2:
+        return "Error: 'window' must be at least 2."
+    try:
+        prices = _extract_price_series(orjson.loads(data_json))
+    except (orjson.JSONDecodeError, TypeError, ValueError, AttributeError) as e:
+        return f"Error: could not read a price series from 'data_json': {e}"
+    if isinstance(prices, str):
+        return prices
+    if len(prices) < 2:
+        return "Error: at least two prices are needed for time-series analysis."
+
+    import numpy as np
+    from shared_tools import finance_kernels
+
+    values = np.asarray(prices, dtype=np.float64)
+    result: Dict[str, Any] = {"points": int(values.shape[0]), "last_price": float(values[-1])}
+    for op in ops:
+        if op == "returns":
+            returns = finance_kernels.log_returns(values)
+            result["returns"] = {"last": float(returns[-1]), "mean": float(returns.mean()), "std": float(returns.std(ddof=1)) if returns.shape[0] > 1 else None}
+        elif op == "rolling_mean":
+            result["rolling_mean"] = _latest(finance_kernels.rolling_mean(values, window))
+        elif op == "rolling_std":
+            result["rolling_std"] = _latest(finance_kernels.rolling_std(values, window))
+        elif op == "zscore":
+            mean, std = _latest(finance_kernels.rolling_mean(values, window)), _latest(finance_kernels.rolling_std(values, window))
+            result["zscore"] = (float(values[-1]) - mean) / std if mean is not None and std else None
+        elif op == "ema":
+            result["ema"] = float(finance_kernels.ema(values, window)[-1])
+        elif op == "max_drawdown":
+            result["max_drawdown"] = float(finance_kernels.max_drawdown(values))
+    return _dump_json(result)
 
 
 # CLI Test (optional)
 if __name__ == "__main__":
     import streamlit as st
     import shutil
-    import os
-    from config.config_manager import ConfigManager # Import ConfigManager for testing setup
-    from shared_tools.llm_embedding_utils import get_llm # For testing summarization with a real LLM
+    from concurrent.futures import ThreadPoolExecutor
     # Import the RBAC-enabled Python interpreter tool for testing purposes here
     from shared_tools.python_interpreter_tool import python_interpreter_with_rbac
+    from unittest.mock import MagicMock
 
     logging.basicConfig(level=logging.INFO)
 
@@ -486,9 +1626,8 @@ search_apis:
     # Re-load config after creating dummy file
     sys.modules['config.config_manager'].config_manager = MockConfigManager()
     sys.modules['config.config_manager'].ConfigManager = MockConfigManager # Also replace the class for singleton check
-    global FINANCE_APIS_CONFIG
-    FINANCE_APIS_CONFIG = _load_finance_apis()
-    print("Dummy finance_apis.yaml created and config reloaded for testing.")
+    refresh_finance_apis() # Resolve the API keys against the mocked secrets
+    print("Dummy finance_apis.yaml created for testing.")
 
 
     if config_manager:
@@ -500,54 +1639,61 @@ search_apis:
 
         # Test finance_data_fetcher - AlphaVantage
         print("\n--- Testing finance_data_fetcher (AlphaVantage) ---")
-        # Mock requests.get for API calls
+        # Mock the pooled session's get for API calls
+
         class MockResponse:
-            def __init__(self, json_data, status_code=200):
-                self._json_data = json_data
+            def __init__(self, body: bytes, status_code=200):
+                self.content = body
                 self.status_code = status_code
-                self.text = json.dumps(json_data)
+                self.text = body.decode()
             def json(self):
-                return self._json_data
+                return orjson.loads(self.content)
             def raise_for_status(self):
                 if self.status_code >= 400:
                     raise requests.exceptions.HTTPError(f"HTTP Error: {self.status_code}", response=self)
 
-        original_requests_get = requests.get
-        requests.get = MagicMock(side_effect=[
-            MockResponse({"Time Series (Daily)": {"2023-01-01": {"1. open": "100.00"}}}),
-            MockResponse({"Symbol": "GOOG", "AssetType": "Common Stock"}),
-            MockResponse({"Global Quote": {"05. price": "150.00"}}),
-            MockResponse({"bitcoin": {"usd": 30000, "eur": 28000}, "ethereum": {"usd": 2000, "eur": 1800}}),
-            MockResponse([{"id": "bitcoin", "symbol": "btc"}]),
-            MockResponse({"prices": [[1672531200000, 30000]]}),
-            MockResponse({"conversion_rates": {"EUR": 0.9}}),
-            MockResponse({"conversion_result": 90.0})
-        ])
-
-        aapl_prices = finance_data_fetcher(api_name="AlphaVantage", data_type="stock_prices", symbol="IBM") # Using IBM for test
-        print(f"IBM Prices (AlphaVantage): {aapl_prices[:200]}...")
-        goog_overview = finance_data_fetcher(api_name="AlphaVantage", data_type="company_overview", symbol="GOOG")
-        print(f"GOOG Overview (AlphaVantage): {goog_overview[:200]}...")
-
-        # Test finance_data_fetcher - CoinGecko
-        print("\n--- Testing finance_data_fetcher (CoinGecko) ---")
-        btc_eth_price = finance_data_fetcher(api_name="CoinGecko", data_type="crypto_price", ids="bitcoin,ethereum", vs_currencies="usd,eur")
-        print(f"BTC/ETH Price (CoinGecko): {btc_eth_price}")
-        coin_list = finance_data_fetcher(api_name="CoinGecko", data_type="crypto_list")
-        print(f"Coin List (CoinGecko): {coin_list[:200]}...")
-        btc_market_chart = finance_data_fetcher(api_name="CoinGecko", data_type="crypto_market_chart", ids="bitcoin", vs_currencies="usd", days=7)
-        print(f"Bitcoin Market Chart (CoinGecko, 7 days): {btc_market_chart[:200]}...")
-
-
-        # Test finance_data_fetcher - ExchangeRate-API
-        print("\n--- Testing finance_data_fetcher (ExchangeRate-API) ---")
-        usd_latest = finance_data_fetcher(api_name="ExchangeRate-API", data_type="exchange_rate_latest", base_currency="USD")
-        print(f"USD Latest Rates (ExchangeRate-API): {usd_latest[:200]}...")
-        usd_eur_convert = finance_data_fetcher(api_name="ExchangeRate-API", data_type="exchange_rate_convert", base_currency="USD", target_currency="EUR", amount=100.0)
-        print(f"100 USD to EUR (ExchangeRate-API): {usd_eur_convert}")
-
-        # Restore original requests.get
-        requests.get = original_requests_get
+        # Canned bodies, serialized once with orjson. AlphaVantage responses are keyed by the
+        # 'function' param; the other APIs by a fragment of the request URL.
+        MOCK_RESPONSES = {
+            "TIME_SERIES_DAILY": orjson.dumps({"Time Series (Daily)": {"2023-01-01": {"1. open": "100.00"}}}),
+            "OVERVIEW": orjson.dumps({"Symbol": "GOOG", "AssetType": "Common Stock"}),
+            "GLOBAL_QUOTE": orjson.dumps({"Global Quote": {"05. price": "150.00"}}),
+            "simple/price": orjson.dumps({"bitcoin": {"usd": 30000, "eur": 28000}, "ethereum": {"usd": 2000, "eur": 1800}}),
+            "coins/list": orjson.dumps([{"id": "bitcoin", "symbol": "btc"}]),
+            "/market_chart": orjson.dumps({"prices": [[1672531200000, 30000]]}),
+            "/latest/": orjson.dumps({"conversion_rates": {"EUR": 0.9}}),
+            "/pair/": orjson.dumps({"conversion_result": 90.0}),
+        }
+        NOT_FOUND = orjson.dumps({"error": "No mock response for this request"})
+
+        def mock_get(url, headers=None, params=None, timeout=None):
+            key = (params or {}).get("function") or next((k for k in MOCK_RESPONSES if k in url), None)
+            body = MOCK_RESPONSES.get(key)
+            return MockResponse(body) if body is not None else MockResponse(NOT_FOUND, status_code=404)
+
+        http_session = _http_session()
+        original_session_get = http_session.get
+        http_session.get = MagicMock(side_effect=mock_get)
+
+        # The fetches are independent (distinct endpoints, no shared files), so they run concurrently;
+        # results are printed afterwards in a fixed order.
+        fetch_cases = {
+            "IBM Prices (AlphaVantage)": dict(api_name="AlphaVantage", data_type="stock_prices", symbol="IBM"), # Using IBM for test
+            "GOOG Overview (AlphaVantage)": dict(api_name="AlphaVantage", data_type="company_overview", symbol="GOOG"),
+            "BTC/ETH Price (CoinGecko)": dict(api_name="CoinGecko", data_type="crypto_price", ids="bitcoin,ethereum", vs_currencies="usd,eur"),
+            "Coin List (CoinGecko)": dict(api_name="CoinGecko", data_type="crypto_list"),
+            "Bitcoin Market Chart (CoinGecko, 7 days)": dict(api_name="CoinGecko", data_type="crypto_market_chart", ids="bitcoin", vs_currencies="usd", days=7),
+            "USD Latest Rates (ExchangeRate-API)": dict(api_name="ExchangeRate-API", data_type="exchange_rate_latest", base_currency="USD"),
+            "100 USD to EUR (ExchangeRate-API)": dict(api_name="ExchangeRate-API", data_type="exchange_rate_convert", base_currency="USD", target_currency="EUR", amount=100.0),
+        }
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            fetch_results = dict(zip(fetch_cases, executor.map(lambda kwargs: finance_data_fetcher.invoke(kwargs), fetch_cases.values())))
+        for label, fetch_result in fetch_results.items():
+            print(f"{label}: {fetch_result[:200]}...")
+        btc_eth_price = fetch_results["BTC/ETH Price (CoinGecko)"]
+
+        # Restore the session's original get
+        http_session.get = original_session_get
 
         # Test python_interpreter_with_rbac with fetched data (example)
         print("\n--- Testing python_interpreter_with_rbac with fetched data ---")
@@ -579,16 +1725,12 @@ print(f"Ethereum price in EUR: {{data.get('ethereum', {{}}).get('eur')}}")
     else:
         print("Skipping finance_tool tests due to ConfigManager issues or missing API keys.")
 
-    # Clean up dummy files and directories
+    # Clean up dummy files and directories (the per-user trees are removed concurrently)
     dummy_json_path = Path("temp_finance_docs.json")
     if dummy_json_path.exists():
         dummy_json_path.unlink()
-    if Path("exports").exists() and (Path("exports") / test_user).exists():
-        shutil.rmtree(Path("exports") / test_user, ignore_errors=True)
-    if Path("uploads").exists() and (Path("uploads") / test_user).exists():
-        shutil.rmtree(Path("uploads") / test_user, ignore_errors=True)
-    if BASE_VECTOR_DIR.exists() and (BASE_VECTOR_DIR / test_user).exists():
-        shutil.rmtree(BASE_VECTOR_DIR / test_user, ignore_errors=True)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda tree: shutil.rmtree(tree, ignore_errors=True), [Path("exports") / test_user, Path("uploads") / test_user, BASE_VECTOR_DIR / test_user]))
     
     dummy_data_dir = Path("data")
     if dummy_data_dir.exists():
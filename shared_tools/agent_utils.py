@@ -0,0 +1,67 @@
+# shared_tools/agent_utils.py
+
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+class ToolTraceHandler(BaseCallbackHandler):
+    """
+    Callback handler that records tool start/end/error events into a bounded deque,
+    as a lightweight alternative to the executor's verbose stdout trace.
+    """
+
+    # Tool output is truncated in the trace to keep the recorded events small
+    max_output_chars: int = 500
+
+    def __init__(self, events: deque):
+        self.events = events
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any) -> None:
+        self.events.append({"time": time.time(), "event": "tool_start", "tool": (serialized or {}).get("name"), "detail": input_str})
+
+    def on_tool_end(self, output: Any, **kwargs: Any) -> None:
+        self.events.append({"time": time.time(), "event": "tool_end", "tool": kwargs.get("name"), "detail": str(output)[:self.max_output_chars]})
+
+    def on_tool_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.events.append({"time": time.time(), "event": "tool_error", "tool": kwargs.get("name"), "detail": str(error)})
+
+# Marks the start of the final answer in a ReAct agent's LLM output
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """
+    Callback handler that passes the tokens of a ReAct agent's final answer to `on_token` as the LLM
+    writes them, i.e. everything after FINAL_ANSWER_MARKER in an LLM call. The Thought/Action text of
+    the other steps is not passed on. Needs an LLM with streaming enabled.
+    """
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self._reset()
+
+    def _reset(self) -> None:
+        self._text = ""
+        self._in_answer = False
+        self._answer_started = False
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        # Each agent step is a new LLM call (chat models are routed here too)
+        self._reset()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if not self._in_answer:
+            # The marker may be split across tokens, so look for it in the text of the call so far
+            self._text += token
+            marker = self._text.find(FINAL_ANSWER_MARKER)
+            if marker == -1:
+                return
+            self._in_answer = True
+            token = self._text[marker + len(FINAL_ANSWER_MARKER):]
+        if not self._answer_started:
+            token = token.lstrip() # Drop the space after the marker
+            if not token:
+                return
+            self._answer_started = True
+        self.on_token(token)
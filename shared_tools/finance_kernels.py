@@ -0,0 +1,128 @@
+# shared_tools/finance_kernels.py
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numba is optional: with it the kernels are compiled to native code (and the compiled code is cached
+# on disk, so only the first process pays the JIT cost); without it they run as plain Python/NumPy.
+try:
+    from numba import njit
+    _jit = njit(cache=True, fastmath=True)
+except ImportError:
+    logger.info("numba not installed; finance kernels will run without JIT compilation.")
+    def _jit(func):
+        return func
+
+__all__ = ["log_returns", "rolling_mean", "rolling_std", "ema", "max_drawdown"]
+
+@_jit
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Computes period-over-period log returns.
+
+    Args:
+        prices (np.ndarray): 1-D float64 array of prices, oldest first.
+
+    Returns:
+        np.ndarray: Array of length len(prices) - 1 with log(p[t] / p[t-1]).
+    """
+    out = np.empty(max(prices.shape[0] - 1, 0))
+    for i in range(1, prices.shape[0]):
+        out[i - 1] = np.log(prices[i] / prices[i - 1])
+    return out
+
+@_jit
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Computes the rolling mean in a single pass (running sum).
+
+    Args:
+        values (np.ndarray): 1-D float64 array.
+        window (int): Window length (>= 1).
+
+    Returns:
+        np.ndarray: Array the same length as `values`; the first window - 1 entries are NaN.
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    for i in range(n):
+        total += values[i]
+        if i >= window:
+            total -= values[i - window]
+        if i >= window - 1:
+            out[i] = total / window
+    return out
+
+@_jit
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Computes the rolling sample standard deviation in a single pass (running sums).
+
+    Args:
+        values (np.ndarray): 1-D float64 array.
+        window (int): Window length (>= 2).
+
+    Returns:
+        np.ndarray: Array the same length as `values`; the first window - 1 entries are NaN.
+    """
+    n = values.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    total_sq = 0.0
+    for i in range(n):
+        total += values[i]
+        total_sq += values[i] * values[i]
+        if i >= window:
+            total -= values[i - window]
+            total_sq -= values[i - window] * values[i - window]
+        if i >= window - 1:
+            variance = (total_sq - total * total / window) / (window - 1)
+            out[i] = np.sqrt(variance) if variance > 0.0 else 0.0
+    return out
+
+@_jit
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Computes the exponential moving average with alpha = 2 / (span + 1), seeded with the first value
+    (matches pandas' `ewm(span=span, adjust=False).mean()`).
+
+    Args:
+        values (np.ndarray): 1-D float64 array, oldest first.
+        span (int): The EMA span.
+
+    Returns:
+        np.ndarray: Array the same length as `values`.
+    """
+    out = np.empty(values.shape[0])
+    if values.shape[0] == 0:
+        return out
+    alpha = 2.0 / (span + 1.0)
+    out[0] = values[0]
+    for i in range(1, values.shape[0]):
+        out[i] = alpha * values[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+@_jit
+def max_drawdown(prices: np.ndarray) -> float:
+    """
+    Computes the maximum peak-to-trough decline.
+
+    Args:
+        prices (np.ndarray): 1-D float64 array of prices, oldest first.
+
+    Returns:
+        float: The maximum drawdown as a fraction of the peak (e.g. 0.25 for -25%); 0.0 if none.
+    """
+    peak = -np.inf
+    worst = 0.0
+    for i in range(prices.shape[0]):
+        if prices[i] > peak:
+            peak = prices[i]
+        elif peak > 0.0:
+            drawdown = (peak - prices[i]) / peak
+            if drawdown > worst:
+                worst = drawdown
+    return worst
@@ -0,0 +1,67 @@
+# shared_tools/json_stream_utils.py
+
+from typing import Any, List, Optional
+
+import orjson
+
+def nest_items(list_key: Optional[str], items: List[Any]) -> Any:
+    """Nests `items` under dotted path `list_key`, e.g. {"_embedded": {"events": items}}; None returns the bare list."""
+    result: Any = items
+    for key in reversed(list_key.split(".") if list_key else []):
+        result = {key: result}
+    return result
+
+def find_list(data: Any, list_key: Optional[str]) -> Optional[List[Any]]:
+    """Returns the list at dotted path `list_key` in `data` (`data` itself when None), or None if there is no list there."""
+    for key in list_key.split(".") if list_key else []:
+        data = data.get(key) if isinstance(data, dict) else None
+    return data if isinstance(data, list) else None
+
+def limit_list(data: Any, list_key: Optional[str], limit: int) -> Any:
+    """
+    Cuts the list at dotted path `list_key` in `data` (`data` itself when None) to `limit` items and
+    returns just that list, nested under its path, so a limited response has the same shape whether it
+    was streamed or fully parsed (a stream stops before the keys that follow the list). Data without a
+    list there is returned unchanged.
+    """
+    items = find_list(data, list_key)
+    if items is None:
+        return data
+    return nest_items(list_key, items[:limit])
+
+class LimitedItemsParser:
+    """
+    Incremental ijson parser collecting up to `limit` items of the list at `list_key` (a dotted path, or
+    None for a top-level list) from a JSON body fed chunk by chunk. The body is kept until the first item
+    turns up, so a response without that list (e.g. an error object, or no results) falls back to a full
+    parse instead of an empty result.
+    """
+
+    def __init__(self, list_key: Optional[str], limit: int):
+        import ijson # Only the limited fetches need it
+        self.list_key = list_key
+        self.limit = limit
+        self.items: List[Any] = []
+        self._body: Optional[List[bytes]] = []
+        self._events = ijson.sendable_list()
+        self._coro = ijson.items_coro(self._events, f"{list_key}.item" if list_key else "item", use_float=True)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parses the next chunk of the body. Returns True once `limit` items have been collected."""
+        if self._body is not None:
+            self._body.append(chunk)
+        self._coro.send(chunk)
+        self.items.extend(self._events)
+        del self._events[:]
+        if self.items:
+            self._body = None
+        return len(self.items) >= self.limit
+
+    def result(self) -> Any:
+        """
+        Returns the items collected, nested under `list_key` (see `limit_list`), or the limited full body
+        if no item was found. Call once the body is fully fed or `feed` returned True.
+        """
+        if not self.items:
+            return limit_list(orjson.loads(b"".join(self._body)), self.list_key, self.limit)
+        return nest_items(self.list_key, self.items[:self.limit])
@@ -29,6 +29,11 @@ def get_embedder():
         openai_api_key = config_manager.get_secret('openai.api_key')
         if not openai_api_key:
             raise ValueError("OpenAI API key not found in secrets.toml under [openai] api_key.")
+        # text-embedding-3-* models can return shortened vectors; fewer dimensions means
+        # proportionally less memory and bandwidth per stored chunk and per query
+        embedding_dimensions = config_manager.get('rag.embedding_dimensions')
+        if embedding_dimensions:
+            return OpenAIEmbeddings(model=embedding_model, openai_api_key=openai_api_key, dimensions=int(embedding_dimensions))
         return OpenAIEmbeddings(model=embedding_model, openai_api_key=openai_api_key)
     elif embedding_mode == "huggingface":
         # For HuggingFace, ensure you have the model downloaded or accessible
@@ -38,14 +43,14 @@ def get_embedder():
         raise ValueError(f"Unsupported embedding mode: {embedding_mode}")
 
 # === LLM Selector ===
-def get_llm(override_temperature: Optional[float] = None): # Added override_temperature
+def get_llm(override_temperature: Optional[float] = None, model: Optional[str] = None): # Added override_temperature
     """
     Gets the appropriate LLM instance based on global config.
     Supports OpenAI, Google Gemini, and Ollama.
-    Allows overriding the temperature setting from config.
+    Allows overriding the temperature and model settings from config.
     """
     llm_provider = config_manager.get('llm.provider', 'openai').lower()
-    llm_model = config_manager.get('llm.model', 'gpt-4o')
+    llm_model = model or config_manager.get('llm.model', 'gpt-4o')
     
     # Use override_temperature if provided, otherwise fall back to config
     temperature = override_temperature if override_temperature is not None else config_manager.get('llm.temperature', 0.7)
@@ -68,6 +73,31 @@ def get_llm(override_temperature: Optional[float] = None): # Added override_temp
     else:
         raise ValueError(f"Unsupported LLM provider: {llm_provider}")
 
+# === LLM Response Cache ===
+_llm_cache_installed = False
+
+def install_llm_cache():
+    """
+    Installs a process-wide LangChain LLM cache so repeated prompts skip the model call.
+    Uses Redis when 'cache.redis_url' is configured (shared across workers),
+    otherwise a local SQLite database at 'llm.cache_path'. Safe to call on every rerun.
+    """
+    global _llm_cache_installed
+    if _llm_cache_installed:
+        return
+
+    from langchain_core.globals import set_llm_cache
+
+    redis_url = config_manager.get('cache.redis_url')
+    if redis_url:
+        import redis
+        from langchain_community.cache import RedisCache
+        set_llm_cache(RedisCache(redis.Redis.from_url(redis_url)))
+    else:
+        from langchain_community.cache import SQLiteCache
+        set_llm_cache(SQLiteCache(database_path=config_manager.get('llm.cache_path', '.langchain_cache.db')))
+    _llm_cache_installed = True
+
 # === Document Loader ===
 SUPPORTED_DOC_EXTS = [".pdf", ".txt", ".csv", ".md", ".docx"]
 
@@ -1,23 +1,77 @@
 # shared_tools/python_interpreter_tool.py
 
 import logging
-from typing import Optional, Dict, Any
+import functools
+import importlib
+import threading
+import orjson
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from langchain_core.tools import tool
-from langchain_community.tools.python.tool import PythonREPLTool
+
+if TYPE_CHECKING:
+    from langchain_community.tools.python.tool import PythonREPLTool
 
 # Import user_manager for RBAC checks
 from utils.user_manager import get_user_tier_capability
 
 logger = logging.getLogger(__name__)
 
-# Initialize the underlying Python REPL tool
-_python_repl_instance = PythonREPLTool()
+# The underlying Python REPL tool is built on first use (see _get_python_repl), so processes that
+# import this module without running code don't pay for the REPL setup on their import path.
+_python_repl_instance: Optional["PythonREPLTool"] = None
+_python_repl_lock = threading.Lock()
+
+# Modules analysis code almost always imports. The REPL runs in-process and keeps its globals between
+# calls, so they are imported once when the REPL is built (ahead of time with prewarm_python_repl)
+# instead of paying the (multi-hundred-millisecond) pandas import inside an analysis call.
+_PRELOAD_MODULES = {"pd": "pandas", "np": "numpy", "datetime": "datetime"}
+
+def _preload_globals(repl_globals: Dict[str, Any]) -> None:
+    """Imports the _PRELOAD_MODULES under their usual aliases, plus orjson and the finance kernels."""
+    # orjson lets analysis code parse large JSON payloads without the stdlib json overhead
+    repl_globals["orjson"] = orjson
+    for alias, module_name in _PRELOAD_MODULES.items():
+        try:
+            repl_globals.setdefault(alias, importlib.import_module(module_name))
+        except ImportError as e:
+            logger.warning(f"Could not preload '{module_name}' into the Python interpreter: {e}")
+
+    # Compiled numeric helpers (log_returns, rolling_mean, rolling_std, ema, max_drawdown) for finance analysis
+    try:
+        from shared_tools import finance_kernels
+        for name in finance_kernels.__all__:
+            repl_globals.setdefault(name, getattr(finance_kernels, name))
+    except ImportError as e:
+        logger.warning(f"Could not preload finance kernels into the Python interpreter: {e}")
+
+def _get_python_repl() -> "PythonREPLTool":
+    """Returns the shared PythonREPLTool, creating and preloading it on first call. Safe to call from several threads."""
+    global _python_repl_instance
+    if _python_repl_instance is None:
+        with _python_repl_lock:
+            if _python_repl_instance is None:
+                from langchain_community.tools.python.tool import PythonREPLTool
+                repl_tool = PythonREPLTool()
+                _preload_globals(repl_tool.python_repl.globals)
+                _python_repl_instance = repl_tool
+    return _python_repl_instance
+
+@functools.cache
+def prewarm_python_repl() -> None:
+    """
+    Builds the REPL on a background thread, so the first analysis call doesn't wait for it and its
+    preloaded modules. Call it from an app's one-time setup; importing this module starts nothing.
+    Only the first call starts the thread.
+    """
+    threading.Thread(target=_get_python_repl, name="python-repl-prewarm", daemon=True).start()
 
 @tool
 def python_interpreter_with_rbac(code: str, user_token: Optional[str] = None) -> str:
     """
     Executes Python code. This tool is designed for complex data analysis, calculations,
     and programmatic logic on structured data. Access is controlled by user tier.
+    Preloaded: pd, np, datetime, orjson, and the compiled helpers log_returns(prices), rolling_mean(values, window),
+    rolling_std(values, window), ema(values, span) and max_drawdown(prices) for float64 arrays.
 
     Args:
         code (str): The Python code string to execute.
@@ -41,7 +95,7 @@ def python_interpreter_with_rbac(code: str, user_token: Optional[str] = None) ->
 
     try:
         # Execute the code using the underlying PythonREPLTool instance
-        result = _python_repl_instance.run(code)
+        result = _get_python_repl().run(code)
         return result
     except Exception as e:
         logger.error(f"Error executing Python code for user '{user_token}': {e}", exc_info=True)
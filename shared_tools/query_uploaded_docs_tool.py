@@ -1,6 +1,6 @@
 # shared_tools/query_uploaded_docs_tool.py
 
-from typing import Optional
+from typing import Callable, List, Optional
 from langchain_core.documents import Document
 from langchain_core.tools import tool
 from pathlib import Path
@@ -34,12 +34,30 @@ def QueryUploadedDocs(
         str: A string containing the combined content of the relevant document chunks,
              or a message indicating no data/results found, or the export path.
     """
+    return search_uploaded_docs(query, user_token, section, export, k)
+
+def search_uploaded_docs(
+    query: str,
+    user_token: str = "default",
+    section: str = "general",
+    export: Optional[bool] = False,
+    k: int = 5,
+    rerank: Optional[Callable[[str, List[Document], int], List[Document]]] = None,
+    shortlist_k: Optional[int] = None
+) -> str:
+    """
+    Implements `QueryUploadedDocs`, for section tools that wrap it. With `rerank`, the vector search
+    retrieves `shortlist_k` chunks and `rerank(query, chunks, k)` picks the `k` that are returned.
+    """
     vector_path = BASE_VECTOR_DIR / user_token / section
     if not vector_path.exists():
         return f"No indexed data found for section '{section}'. Please upload relevant documents first."
 
     # Use the generic query_vectorstore from shared_tools
-    results: list[Document] = query_vectorstore(query, user_token, section, k=k)
+    if rerank is not None and shortlist_k and shortlist_k > k:
+        results: list[Document] = rerank(query, query_vectorstore(query, user_token, section, k=shortlist_k), k)
+    else:
+        results = query_vectorstore(query, user_token, section, k=k)
 
     if not results:
         return f"No matching results found in uploaded content for section '{section}'."
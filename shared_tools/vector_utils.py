@@ -108,6 +108,23 @@ def query_vectorstore(query: str, user_token: str, section: str, k: int = 5) ->
     results = vectordb.similarity_search(query, k=k)
     return results
 
+def query_vectorstore_batch(queries: List[str], user_token: str, section: str, k: int = 5) -> List[List[Document]]:
+    """
+    Search the vector DB for several queries at once for a given user and section.
+    All queries are embedded in a single embedding call and searched against one loaded DB,
+    instead of one embedding round trip and DB load per query.
+    Returns one list of LangChain Document objects per query, in order.
+    """
+    vector_dir = BASE_VECTOR_DIR / user_token / section
+    if not vector_dir.exists() or not queries:
+        return [[] for _ in queries]
+
+    embedder = get_embedder()
+    vectordb = Chroma(persist_directory=str(vector_dir), embedding_function=embedder)
+
+    query_vectors = embedder.embed_documents(list(queries)) # One batched request for all queries
+    return [vectordb.similarity_search_by_vector(vector, k=k) for vector in query_vectors]
+
 
 # CLI Test (optional, for direct testing outside Streamlit)
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+# tests/conftest.py
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import httpx
+import pytest
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+# The tool modules import the document backends (vector store, scraper, summarizer) at module level.
+# The helpers under test never call them, so where a backend can't be imported here (its LangChain
+# community / vector store dependencies aren't installed) a stand-in that refuses to be called is
+# registered instead, letting the tool modules import.
+_DOCUMENT_BACKENDS = {
+    "shared_tools.query_uploaded_docs_tool": ["QueryUploadedDocs", "search_uploaded_docs"],
+    "shared_tools.scraper_tool": ["scrape_web"],
+    "shared_tools.doc_summarizer": ["summarize_document"],
+    "shared_tools.import_utils": ["process_upload", "clear_indexed_data"],
+    "shared_tools.export_utils": ["export_response", "export_vector_results"],
+    "shared_tools.vector_utils": ["build_vectorstore", "load_docs_from_json_file", "query_vectorstore", "query_vectorstore_batch", "BASE_VECTOR_DIR"],
+}
+
+def _unavailable(name: str):
+    def call(*args, **kwargs):
+        raise RuntimeError(f"{name} is not available in the test environment")
+    return call
+
+for module_name, attributes in _DOCUMENT_BACKENDS.items():
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        stand_in = types.ModuleType(module_name)
+        for attribute in attributes:
+            setattr(stand_in, attribute, _unavailable(f"{module_name}.{attribute}"))
+        sys.modules[module_name] = stand_in
+
+FINANCE_APIS_YAML = """
+apis:
+  - name: "AlphaVantage"
+    endpoint: "https://www.alphavantage.co/query"
+    key_name: "apikey"
+    key_value: ""
+    headers: {}
+    default_params: {}
+    functions:
+      TIME_SERIES_DAILY:
+        params: {function: "TIME_SERIES_DAILY", symbol: "", outputsize: "compact", datatype: "json"}
+      GLOBAL_QUOTE:
+        params: {function: "GLOBAL_QUOTE", symbol: "", datatype: "json"}
+      COMPANY_OVERVIEW:
+        params: {function: "OVERVIEW", symbol: "", datatype: "json"}
+      REALTIME_BULK_QUOTES:
+        params: {function: "REALTIME_BULK_QUOTES", symbol: "", datatype: "json"}
+  - name: "CoinGecko"
+    endpoint: "https://api.coingecko.com/api/v3/"
+    key_name: ""
+    key_value: ""
+    headers: {}
+    default_params: {}
+    functions:
+      SIMPLE_PRICE:
+        path: "simple/price"
+      COINS_LIST:
+        path: "coins/list"
+      COINS_MARKET_CHART:
+        path: "coins/{id}/market_chart"
+        params: {vs_currency: "usd", days: "7"}
+  - name: "ExchangeRate-API"
+    endpoint: "https://v6.exchangerate-api.com/v6/"
+    key_name: ""
+    key_value: "load_from_secrets.exchangerate_api_key"
+    headers: {}
+    default_params: {}
+    functions:
+      LATEST:
+        path: "{api_key}/latest/{base_currency}"
+      PAIR_CONVERSION:
+        path: "{api_key}/pair/{base_currency}/{target_currency}/{amount}"
+"""
+
+@pytest.fixture
+def finance_tool(tmp_path, monkeypatch):
+    """
+    The finance_tool module, reading its API config from a test copy of finance_apis.yaml (without
+    rate limits) and with its response cache and parsed config cleared around the test.
+    """
+    from finance_tools import finance_tool as module
+
+    apis_path = tmp_path / "finance_apis.yaml"
+    apis_path.write_text(FINANCE_APIS_YAML)
+    monkeypatch.setattr(module, "_FINANCE_APIS_PATH", apis_path)
+    monkeypatch.setattr(module.config_manager, "get_secret", lambda key, default=None: f"secret-{key}")
+    module.refresh_finance_apis()
+    module._FETCH_CACHE.clear()
+    module._token_bucket.cache_clear()
+    yield module
+    module.refresh_finance_apis()
+    module._FETCH_CACHE.clear()
+    module._token_bucket.cache_clear()
+
+@pytest.fixture
+def set_api_option(finance_tool, monkeypatch):
+    """Returns a function that overrides fields of one API's parsed config for the duration of a test."""
+    def set_option(api_name: str, **options):
+        apis = finance_tool._load_finance_apis()
+        monkeypatch.setitem(apis, api_name, {**apis[api_name], **options})
+    return set_option
+
+class _HandlerAdapter(requests.adapters.BaseAdapter):
+    """A requests transport adapter that answers from an httpx-style handler instead of the network."""
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+
+    def send(self, request, **kwargs):
+        reply = self.handler(httpx.Request(request.method, request.url, headers=dict(request.headers)))
+        response = requests.Response()
+        response.status_code = reply.status_code
+        response._content = reply.content
+        response._content_consumed = True # Lets iter_content serve the body for streamed requests
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def finance_http(finance_tool, monkeypatch):
+    """
+    Returns a function that routes every finance API call (requests session, sync HTTP/2 client and
+    async fan-out client) to `handler`, a function from httpx.Request to httpx.Response.
+    """
+    def route(handler):
+        session = requests.Session()
+        session.mount("https://", _HandlerAdapter(handler))
+        monkeypatch.setattr(finance_tool, "_http_session", lambda: session)
+        monkeypatch.setattr(finance_tool, "_http2_client", lambda: httpx.Client(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(finance_tool, "_async_finance_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return route
+
+ENTERTAINMENT_APIS_YAML = """
+apis:
+  - name: "IMDb"
+    endpoint: "https://imdb-api.com/API/"
+    key_name: "apiKey"
+    key_value: "load_from_secrets.imdb_api_key"
+    headers: {}
+    default_params: {}
+    functions:
+      SEARCH_TITLE:
+        path: "Search"
+  - name: "Ticketmaster"
+    endpoint: "https://app.ticketmaster.com/discovery/v2/"
+    key_name: "apikey"
+    key_value: "load_from_secrets.ticketmaster_api_key"
+    headers: {}
+    default_params: {}
+    functions:
+      EVENT_SEARCH:
+        path: "events.json"
+"""
+
+@pytest.fixture
+def entertainment_tool(tmp_path, monkeypatch):
+    """
+    The entertainment_tool module, reading its API config from a test entertainment_apis.yaml, with
+    its config caches and response cache cleared around the test.
+    """
+    from entertainment_tools import entertainment_tool as module
+
+    def clear_caches():
+        for cached in (module._entertainment_apis_config, module._request_dispatch, module._validate_route):
+            cached.cache_clear()
+        module._RESPONSE_CACHE.clear()
+
+    apis_path = tmp_path / "entertainment_apis.yaml"
+    apis_path.write_text(ENTERTAINMENT_APIS_YAML)
+    monkeypatch.setattr(module, "_ENTERTAINMENT_APIS_PATH", str(apis_path))
+    monkeypatch.setattr(module.config_manager, "get_secret", lambda key, default=None: f"secret-{key}")
+    clear_caches()
+    yield module
+    clear_caches()
+
+@pytest.fixture
+def entertainment_http(entertainment_tool, monkeypatch):
+    """Returns a function that routes the entertainment API calls to `handler`, a function from httpx.Request to httpx.Response."""
+    def route(handler):
+        monkeypatch.setattr(entertainment_tool, "_http_client", lambda: httpx.Client(transport=httpx.MockTransport(handler)))
+    return route
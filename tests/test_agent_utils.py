@@ -0,0 +1,66 @@
+# tests/test_agent_utils.py
+
+import pytest
+
+from shared_tools.agent_utils import FinalAnswerStreamHandler, ToolTraceHandler
+
+def _stream(handler, tokens):
+    handler.on_llm_start({}, ["prompt"])
+    for token in tokens:
+        handler.on_llm_new_token(token)
+
+def test_final_answer_tokens_are_passed_on_after_the_marker():
+    tokens = []
+    handler = FinalAnswerStreamHandler(tokens.append)
+    _stream(handler, ["Thought: I know it\n", "Final", " Answer", ":", " Apple", " is", " up", " 2%."])
+    assert "".join(tokens) == "Apple is up 2%."
+
+def test_marker_and_answer_in_one_token():
+    tokens = []
+    handler = FinalAnswerStreamHandler(tokens.append)
+    _stream(handler, ["Thought: done\nFinal Answer: Yes", "."])
+    assert tokens == ["Yes", "."]
+
+def test_tool_steps_are_not_passed_on():
+    tokens = []
+    handler = FinalAnswerStreamHandler(tokens.append)
+    _stream(handler, ["Thought: look it up\n", "Action: finance_data_fetcher\n", "Action Input: {}"])
+    _stream(handler, ["Thought: got it\nFinal Answer:", " 42"])
+    assert tokens == ["42"]
+
+def test_agent_run_streams_only_the_final_answer():
+    agents = pytest.importorskip("langchain.agents")
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.tools import tool
+
+    @tool
+    def lookup(query: str) -> str:
+        """Looks up a value."""
+        return "42"
+
+    # Streams each reply in pieces through the callbacks, as a streaming chat model does
+    llm = GenericFakeChatModel(messages=iter([
+        AIMessage(content="Thought: I should look it up\nAction: lookup\nAction Input: answer"),
+        AIMessage(content="Thought: I know it now\nFinal Answer: The answer is 42."),
+    ]))
+    prompt = PromptTemplate.from_template("{tools} {tool_names}\nQuestion: {input}\n{agent_scratchpad}")
+    executor = agents.AgentExecutor(agent=agents.create_react_agent(llm, [lookup], prompt), tools=[lookup])
+
+    tokens = []
+    chunks = list(executor.stream({"input": "what is it?"}, config={"callbacks": [FinalAnswerStreamHandler(tokens.append)]}))
+    assert "".join(tokens) == "The answer is 42."
+    assert chunks[-1]["output"] == "The answer is 42."
+
+def test_tool_trace_keeps_the_latest_events_with_truncated_output():
+    from collections import deque
+
+    events = deque(maxlen=2)
+    handler = ToolTraceHandler(events)
+    handler.on_tool_start({"name": "lookup"}, "AAPL")
+    handler.on_tool_end("x" * 1000, name="lookup")
+    handler.on_tool_error(ValueError("boom"), name="lookup")
+    assert [event["event"] for event in events] == ["tool_end", "tool_error"]
+    assert events[0]["detail"] == "x" * ToolTraceHandler.max_output_chars
+    assert events[1]["detail"] == "boom"
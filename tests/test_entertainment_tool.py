@@ -0,0 +1,120 @@
+# tests/test_entertainment_tool.py
+
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+EVENTS = [{"name": f"Concert {i}", "id": str(i)} for i in range(6)]
+# The Ticketmaster Discovery API nests the events under "_embedded"
+TICKETMASTER_BODY = {"_embedded": {"events": EVENTS}, "page": {"size": 6, "totalElements": 6}}
+
+def test_format_response_with_limit_keeps_only_the_nested_list(entertainment_tool):
+    result = entertainment_tool._format_entertainment_response(orjson.loads(orjson.dumps(TICKETMASTER_BODY)), 2, "_embedded.events")
+    assert orjson.loads(result) == {"_embedded": {"events": EVENTS[:2]}}
+
+def test_format_response_without_limit_keeps_the_whole_body(entertainment_tool):
+    result = entertainment_tool._format_entertainment_response(orjson.loads(orjson.dumps(TICKETMASTER_BODY)), None, "_embedded.events")
+    assert orjson.loads(result) == TICKETMASTER_BODY
+
+# --- entertainment_data_fetcher ---
+
+def test_ticketmaster_default_list_key_is_the_nested_events(entertainment_tool):
+    request = entertainment_tool._build_entertainment_request("Ticketmaster", "event_search", query="jazz", limit=2)
+    assert request["list_key"] == "_embedded.events"
+    assert request["params"] == {"keyword": "jazz", "apikey": "secret-ticketmaster_api_key"}
+
+@pytest.mark.parametrize("limit, expected", [
+    (2, {"_embedded": {"events": EVENTS[:2]}}), # Streamed and cut after `limit` events
+    (None, TICKETMASTER_BODY), # Parsed in full
+])
+def test_ticketmaster_event_search_limits_the_events(entertainment_tool, entertainment_http, limit, expected):
+    entertainment_http(lambda request: httpx.Response(200, json=TICKETMASTER_BODY))
+    result = entertainment_tool.entertainment_data_fetcher.func(api_name="Ticketmaster", data_type="event_search", query="jazz", limit=limit)
+    assert orjson.loads(result) == expected
+
+@pytest.mark.parametrize("body", [
+    {"page": {"size": 0, "totalElements": 0}},
+    {"events": EVENTS},
+])
+def test_streamed_search_without_the_list_returns_the_response(entertainment_tool, entertainment_http, body):
+    entertainment_http(lambda request: httpx.Response(200, json=body))
+    result = entertainment_tool.entertainment_data_fetcher.func(api_name="Ticketmaster", data_type="event_search", query="jazz", limit=2)
+    assert orjson.loads(result) == body
+
+def test_batch_fetch_streams_the_nested_events(entertainment_tool):
+    async def fetch():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=TICKETMASTER_BODY))) as client:
+            return await entertainment_tool._fetch_one(client, {"api_name": "Ticketmaster", "data_type": "event_search", "query": "jazz", "limit": 1})
+    assert orjson.loads(asyncio.run(fetch())) == {"_embedded": {"events": EVENTS[:1]}}
+
+# --- Dispatch, validation and caching ---
+
+def test_imdb_search_escapes_the_query_path_segment(entertainment_tool):
+    request = entertainment_tool._build_entertainment_request("IMDb", "search_title", query="AC/DC: Live?")
+    assert request["url"] == "https://imdb-api.com/API/secret-imdb_api_key/Search/AC%2FDC%3A%20Live%3F"
+    assert request["list_key"] == "results"
+
+@pytest.mark.parametrize("api_name, data_type, error", [
+    ("Nope", "search_title", "Error: API 'Nope' not found in data/entertainment_apis.yaml configuration."),
+    ("IMDb", "event_search", "Error: Unsupported data_type 'event_search' for IMDb."),
+    ("IMDb", "movie_details", "Error: Unsupported data_type 'movie_details' for IMDb."), # No MOVIE_DETAILS path in the config
+])
+def test_unsupported_routes_return_error_messages(entertainment_tool, api_name, data_type, error):
+    assert entertainment_tool._build_entertainment_request(api_name, data_type, query="x", title="x") == error
+
+def test_repeated_fetch_is_served_from_cache(entertainment_tool, entertainment_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, json=TICKETMASTER_BODY)
+    entertainment_http(handler)
+
+    args = {"api_name": "Ticketmaster", "data_type": "event_search", "query": "jazz"}
+    assert entertainment_tool.entertainment_data_fetcher.func(**args) == entertainment_tool.entertainment_data_fetcher.func(**args)
+    assert len(calls) == 1
+    entertainment_tool.entertainment_data_fetcher.func(**{**args, "query": "rock"})
+    assert len(calls) == 2
+
+def test_failed_fetch_is_not_cached(entertainment_tool, entertainment_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(404, text="not found")
+    entertainment_http(handler)
+
+    args = {"api_name": "Ticketmaster", "data_type": "event_search", "query": "jazz"}
+    assert entertainment_tool.entertainment_data_fetcher.func(**args) == "API request failed for Ticketmaster: not found"
+    entertainment_tool.entertainment_data_fetcher.func(**args)
+    assert len(calls) == 2
+
+def test_single_flight_shares_one_call_between_concurrent_callers(entertainment_tool, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    waiting = threading.Semaphore(0)
+    class CountedEvent(threading.Event):
+        def wait(self, timeout=None):
+            waiting.release() # A follower is now waiting on the leader's call
+            return super().wait(timeout)
+    class InflightCall(entertainment_tool._InflightCall):
+        def __init__(self):
+            super().__init__()
+            self.done = CountedEvent()
+    monkeypatch.setattr(entertainment_tool, "_InflightCall", InflightCall)
+
+    calls = []
+    def fetch():
+        calls.append(1)
+        for _ in range(3): # Hold the call open until every follower waits on it
+            assert waiting.acquire(timeout=5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(entertainment_tool._single_flight, ("event_search", "key"), fetch) for _ in range(4)]
+        results = [future.result(5) for future in futures]
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert entertainment_tool._INFLIGHT_CALLS == {}
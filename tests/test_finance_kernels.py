@@ -0,0 +1,43 @@
+# tests/test_finance_kernels.py
+
+import numpy as np
+import pytest
+
+from shared_tools import finance_kernels
+
+PRICES = np.array([100.0, 102.0, 101.0, 105.0, 98.0, 99.0, 107.0, 110.0, 104.0, 108.0])
+
+def test_log_returns_matches_numpy():
+    np.testing.assert_allclose(finance_kernels.log_returns(PRICES), np.diff(np.log(PRICES)))
+
+def test_log_returns_of_a_single_price_is_empty():
+    assert finance_kernels.log_returns(np.array([100.0])).shape == (0,)
+
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_rolling_mean_matches_convolution(window):
+    result = finance_kernels.rolling_mean(PRICES, window)
+    expected = np.convolve(PRICES, np.ones(window) / window, mode="valid")
+    assert np.isnan(result[:window - 1]).all()
+    np.testing.assert_allclose(result[window - 1:], expected)
+
+@pytest.mark.parametrize("window", [2, 4])
+def test_rolling_std_matches_sample_std(window):
+    result = finance_kernels.rolling_std(PRICES, window)
+    expected = [PRICES[i - window + 1:i + 1].std(ddof=1) for i in range(window - 1, PRICES.shape[0])]
+    assert np.isnan(result[:window - 1]).all()
+    np.testing.assert_allclose(result[window - 1:], expected)
+
+def test_ema_matches_pandas_adjust_false():
+    pd = pytest.importorskip("pandas")
+    expected = pd.Series(PRICES).ewm(span=4, adjust=False).mean().to_numpy()
+    np.testing.assert_allclose(finance_kernels.ema(PRICES, 4), expected)
+
+def test_ema_of_empty_series_is_empty():
+    assert finance_kernels.ema(np.array([], dtype=np.float64), 4).shape == (0,)
+
+def test_max_drawdown_is_largest_peak_to_trough_fraction():
+    # Peak 105 -> trough 98 is the deepest fall
+    assert finance_kernels.max_drawdown(PRICES) == pytest.approx((105.0 - 98.0) / 105.0)
+
+def test_max_drawdown_of_rising_series_is_zero():
+    assert finance_kernels.max_drawdown(np.array([1.0, 2.0, 3.0])) == 0.0
@@ -0,0 +1,220 @@
+# tests/test_finance_tool.py
+
+import httpx
+import orjson
+import pytest
+
+# --- Request building: dispatch, validation and fan-out ---
+
+def test_single_symbol_builds_one_request_keyed_by_none(finance_tool):
+    requests_by_symbol = finance_tool._build_finance_requests("AlphaVantage", "stock_prices", symbol="IBM")
+    assert list(requests_by_symbol) == [None]
+    params = requests_by_symbol[None]["params"]
+    assert params["function"] == "TIME_SERIES_DAILY"
+    assert params["symbol"] == "IBM"
+
+@pytest.mark.parametrize("api_name, data_type, fan_out_arg, value, expected_items", [
+    ("AlphaVantage", "stock_prices", "symbol", "AAPL, MSFT", ["AAPL", "MSFT"]),
+    ("AlphaVantage", "global_quote", "symbol", "AAPL,MSFT,IBM", ["AAPL", "MSFT", "IBM"]),
+    ("CoinGecko", "crypto_market_chart", "ids", "bitcoin,ethereum", ["bitcoin", "ethereum"]),
+    ("ExchangeRate-API", "exchange_rate_convert", "target_currency", "eur,gbp", ["eur", "gbp"]),
+])
+def test_fan_out_args_build_one_request_per_item(finance_tool, api_name, data_type, fan_out_arg, value, expected_items):
+    assert finance_tool._FAN_OUT_ARGS[(api_name, data_type)] == fan_out_arg
+    args = {"symbol": None, "ids": None, "vs_currencies": "usd", "days": 7, "base_currency": "usd", "target_currency": None, "amount": 5}
+    args[fan_out_arg] = value
+    requests_by_symbol = finance_tool._build_finance_requests(api_name, data_type, **args)
+    assert list(requests_by_symbol) == expected_items
+
+def test_market_chart_fan_out_fills_each_coin_into_the_url(finance_tool):
+    requests_by_symbol = finance_tool._build_finance_requests("CoinGecko", "crypto_market_chart", ids="bitcoin,ethereum", vs_currencies="usd", days=7)
+    assert requests_by_symbol["bitcoin"]["url"] == "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+    assert requests_by_symbol["ethereum"]["url"] == "https://api.coingecko.com/api/v3/coins/ethereum/market_chart"
+
+def test_crypto_price_sends_all_ids_in_one_request(finance_tool):
+    requests_by_symbol = finance_tool._build_finance_requests("CoinGecko", "crypto_price", ids="bitcoin,ethereum", vs_currencies="usd")
+    assert list(requests_by_symbol) == [None]
+    assert requests_by_symbol[None]["params"]["ids"] == "bitcoin,ethereum"
+
+def test_exchange_rate_url_uses_resolved_key_and_upper_case_codes(finance_tool):
+    requests_by_symbol = finance_tool._build_finance_requests("ExchangeRate-API", "exchange_rate_convert", base_currency="usd", target_currency="eur", amount=2.5)
+    assert requests_by_symbol[None]["url"] == "https://v6.exchangerate-api.com/v6/secret-exchangerate_api_key/pair/USD/EUR/2.5"
+
+def test_limit_marks_streamed_payloads(finance_tool):
+    requests_by_symbol = finance_tool._build_finance_requests("CoinGecko", "crypto_list", limit=5)
+    assert requests_by_symbol[None]["stream_items"] == (None, 5)
+    requests_by_symbol = finance_tool._build_finance_requests("CoinGecko", "crypto_list")
+    assert "stream_items" not in requests_by_symbol[None]
+
+@pytest.mark.parametrize("api_name, data_type, args, error", [
+    ("AlphaVantage", "global_quote", {}, "Error: 'symbol' is required for AlphaVantage global_quote."),
+    ("CoinGecko", "crypto_market_chart", {"ids": "bitcoin", "vs_currencies": "usd"}, "Error: 'ids', 'vs_currencies', and 'days' are required for CoinGecko crypto_market_chart."),
+    ("ExchangeRate-API", "exchange_rate_convert", {"base_currency": "usd", "target_currency": "eur"}, "Error: 'base_currency', 'target_currency', and 'amount' are required for conversion."),
+    ("AlphaVantage", "crypto_price", {"symbol": "IBM"}, "Error: Unsupported data_type 'crypto_price' for AlphaVantage."),
+    ("Nope", "global_quote", {"symbol": "IBM"}, "Error: API 'Nope' not found in data/finance_apis.yaml configuration."),
+])
+def test_invalid_calls_return_error_messages(finance_tool, api_name, data_type, args, error):
+    assert finance_tool._build_finance_requests(api_name, data_type, **args) == error
+
+def test_zero_amount_counts_as_given(finance_tool):
+    args = {"base_currency": "usd", "target_currency": "eur", "amount": 0}
+    assert finance_tool._missing_fetch_arg("ExchangeRate-API", "exchange_rate_convert", args) is None
+
+# --- Response cache ---
+
+def test_fetch_cache_expiry_depends_on_data_type(finance_tool):
+    assert finance_tool._fetch_cache_ttu(("CoinGecko", "crypto_price", ()), None, 1000.0) == 1030.0
+    assert finance_tool._fetch_cache_ttu(("CoinGecko", "crypto_list", ()), None, 1000.0) == 1000.0 + 604800
+    assert finance_tool._fetch_cache_ttu(("X", "unknown", ()), None, 1000.0) == 1060.0
+
+def test_repeated_fetch_is_served_from_cache(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, json={"bitcoin": {"usd": 1.0}})
+    finance_http(handler)
+
+    args = {"api_name": "CoinGecko", "data_type": "crypto_price", "ids": "bitcoin", "vs_currencies": "usd"}
+    first = finance_tool.finance_data_fetcher.func(**args)
+    second = finance_tool.finance_data_fetcher.func(**args)
+    assert first == second
+    assert orjson.loads(first) == {"bitcoin": {"usd": 1.0}}
+    assert len(calls) == 1
+
+    finance_tool.finance_data_fetcher.func(**args, bypass_cache=True)
+    assert len(calls) == 2
+
+def test_failed_fetch_is_not_cached(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(503, text="unavailable")
+    finance_http(handler)
+
+    args = {"api_name": "CoinGecko", "data_type": "crypto_price", "ids": "bitcoin", "vs_currencies": "usd"}
+    assert finance_tool.finance_data_fetcher.func(**args) == "API request failed for CoinGecko: unavailable"
+    finance_tool.finance_data_fetcher.func(**args)
+    assert len(calls) == 2
+
+def test_failed_fan_out_item_keeps_the_other_items_and_is_not_cached(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        symbol = request.url.params["symbol"]
+        calls.append(symbol)
+        if symbol == "BAD":
+            return httpx.Response(500, text="server error")
+        return httpx.Response(200, json={"Global Quote": {"01. symbol": symbol}})
+    finance_http(handler)
+
+    args = {"api_name": "AlphaVantage", "data_type": "global_quote", "symbol": "AAPL,BAD,MSFT"}
+    data = orjson.loads(finance_tool.finance_data_fetcher.func(**args))
+    assert data["AAPL"] == {"Global Quote": {"01. symbol": "AAPL"}}
+    assert data["MSFT"] == {"Global Quote": {"01. symbol": "MSFT"}}
+    assert data["BAD"] == "API request failed for AlphaVantage: server error"
+
+    finance_tool.finance_data_fetcher.func(**args)
+    assert sorted(calls) == ["AAPL", "AAPL", "BAD", "BAD", "MSFT", "MSFT"]
+
+def test_fan_out_with_every_item_failed_keeps_each_error(finance_tool, finance_http):
+    finance_http(lambda request: httpx.Response(500, text="server error"))
+    content = finance_tool.finance_data_fetcher.func(api_name="AlphaVantage", data_type="global_quote", symbol="AAPL,MSFT")
+    assert orjson.loads(content) == {"AAPL": "API request failed for AlphaVantage: server error", "MSFT": "API request failed for AlphaVantage: server error"}
+
+# --- Rate limiting ---
+
+def test_token_bucket_reserves_only_tokens_within_the_max_wait(finance_tool):
+    bucket = finance_tool._TokenBucket("AlphaVantage", rate_per_minute=5, burst=1)
+    waits = bucket.reserve(4)
+    # One token now, the next after 12s; 24s would exceed _MAX_RATE_LIMIT_WAIT_SECONDS
+    assert waits == [0.0, pytest.approx(12.0, abs=0.1)]
+    with pytest.raises(finance_tool._RateLimitExceeded, match="retry in 24s"):
+        bucket.acquire()
+    # The rejected calls took no tokens, and a refunded one is available again
+    bucket.refund()
+    assert bucket.reserve(1) == [pytest.approx(12.0, abs=0.1)]
+
+def test_token_bucket_burst_goes_out_without_waiting(finance_tool):
+    bucket = finance_tool._TokenBucket("AlphaVantage", rate_per_minute=5, burst=5)
+    assert bucket.reserve(4) == [0.0, 0.0, 0.0, 0.0]
+
+def test_four_symbol_fan_out_fits_the_alphavantage_rate_limit(finance_tool, finance_http, set_api_option):
+    set_api_option("AlphaVantage", rate_limit_per_minute=5, rate_limit_burst=5) # As in data/finance_apis.yaml
+    finance_http(lambda request: httpx.Response(200, json={"Global Quote": {"01. symbol": request.url.params["symbol"]}}))
+    symbols = ["AAPL", "MSFT", "IBM", "GOOG"]
+    data = orjson.loads(finance_tool.finance_data_fetcher.func(api_name="AlphaVantage", data_type="global_quote", symbol=",".join(symbols)))
+    assert data == {symbol: {"Global Quote": {"01. symbol": symbol}} for symbol in symbols}
+
+def test_fan_out_over_the_rate_limit_fails_per_item(finance_tool, finance_http, set_api_option, monkeypatch):
+    set_api_option("AlphaVantage", rate_limit_per_minute=5, rate_limit_burst=1)
+    monkeypatch.setattr(finance_tool, "_MAX_RATE_LIMIT_WAIT_SECONDS", 0.0) # Only the burst token is available without waiting
+    sent = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.url.params["symbol"])
+        return httpx.Response(200, json={"Global Quote": {}})
+    finance_http(handler)
+
+    data = orjson.loads(finance_tool.finance_data_fetcher.func(api_name="AlphaVantage", data_type="global_quote", symbol="AAPL,MSFT,IBM,GOOG"))
+    assert sent == ["AAPL"]
+    assert data["AAPL"] == {"Global Quote": {}}
+    for symbol in ("MSFT", "IBM", "GOOG"):
+        assert data[symbol].startswith("API request for AlphaVantage not sent: rate limit reached, retry in")
+
+# --- Limited (streamed) payloads ---
+
+def test_limited_crypto_list_is_cut_and_cached(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, json=[{"id": f"coin{i}"} for i in range(50)])
+    finance_http(handler)
+
+    content = finance_tool.finance_data_fetcher.func(api_name="CoinGecko", data_type="crypto_list", limit=2)
+    assert orjson.loads(content) == [{"id": "coin0"}, {"id": "coin1"}]
+    finance_tool.finance_data_fetcher.func(api_name="CoinGecko", data_type="crypto_list", limit=2)
+    assert len(calls) == 1
+
+@pytest.mark.parametrize("data_type, args", [
+    ("crypto_list", {}),
+    ("crypto_market_chart", {"ids": "nocoin", "vs_currencies": "usd", "days": 7}),
+])
+def test_limited_fetch_without_the_list_returns_the_body_uncached(finance_tool, finance_http, data_type, args):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, json={"error": "coin not found"})
+    finance_http(handler)
+
+    content = finance_tool.finance_data_fetcher.func(api_name="CoinGecko", data_type=data_type, limit=2, **args)
+    assert orjson.loads(content) == {"error": "coin not found"}
+    finance_tool.finance_data_fetcher.func(api_name="CoinGecko", data_type=data_type, limit=2, **args)
+    assert len(calls) == 2
+
+def test_limited_market_chart_fan_out_with_an_error_body_is_not_cached(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        coin = request.url.path.split("/")[-2]
+        calls.append(coin)
+        if coin == "nocoin":
+            return httpx.Response(200, json={"error": "coin not found"})
+        return httpx.Response(200, json={"prices": [[1, 10.0], [2, 11.0], [3, 12.0]], "market_caps": []})
+    finance_http(handler)
+
+    args = {"api_name": "CoinGecko", "data_type": "crypto_market_chart", "ids": "bitcoin,nocoin", "vs_currencies": "usd", "days": 7, "limit": 2}
+    content = finance_tool.finance_data_fetcher.func(**args)
+    assert orjson.loads(content) == {"bitcoin": {"prices": [[1, 10.0], [2, 11.0]]}, "nocoin": {"error": "coin not found"}}
+    finance_tool.finance_data_fetcher.func(**args)
+    assert sorted(calls) == ["bitcoin", "bitcoin", "nocoin", "nocoin"]
+
+def test_cached_market_chart_is_summarized_per_call(finance_tool, finance_http):
+    calls = []
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        return httpx.Response(200, json={"prices": [[0, 10.0], [86400000, 12.0]]})
+    finance_http(handler)
+
+    args = {"api_name": "CoinGecko", "data_type": "crypto_market_chart", "ids": "bitcoin", "vs_currencies": "usd", "days": 1}
+    raw = finance_tool.finance_data_fetcher.func(**args)
+    summary = orjson.loads(finance_tool.finance_data_fetcher.func(**args, summarize=True))
+    assert summary["change_pct"] == pytest.approx(20.0)
+    assert finance_tool.finance_data_fetcher.func(**args) == raw
+    assert len(calls) == 1
@@ -0,0 +1,65 @@
+# tests/test_json_stream_utils.py
+
+import orjson
+import pytest
+
+from shared_tools.json_stream_utils import LimitedItemsParser, limit_list
+
+EVENTS = [{"name": f"Concert {i}", "id": str(i)} for i in range(6)]
+# The Ticketmaster Discovery API nests the events under "_embedded"
+TICKETMASTER_BODY = {"_embedded": {"events": EVENTS}, "page": {"size": 6, "totalElements": 6}}
+
+def _chunks(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+def _feed_in_chunks(parser, body: bytes, size: int = 8):
+    for chunk in _chunks(body, size):
+        if parser.feed(chunk):
+            break
+    return parser.result()
+
+def test_top_level_list_stops_after_limit():
+    body = orjson.dumps([{"id": f"coin{i}"} for i in range(100)])
+    parser = LimitedItemsParser(None, 3)
+    fed = 0
+    for chunk in _chunks(body, 16):
+        fed += 1
+        if parser.feed(chunk):
+            break
+    assert parser.result() == [{"id": "coin0"}, {"id": "coin1"}, {"id": "coin2"}]
+    assert fed < len(_chunks(body, 16)) # The rest of the body was never parsed
+
+def test_keyed_list_drops_the_other_keys():
+    body = orjson.dumps({"prices": [[1, 10.5], [2, 11.0], [3, 12.25]], "market_caps": [[1, 5]]})
+    assert _feed_in_chunks(LimitedItemsParser("prices", 2), body, 7) == {"prices": [[1, 10.5], [2, 11.0]]}
+
+def test_nested_list_key():
+    assert _feed_in_chunks(LimitedItemsParser("_embedded.events", 3), orjson.dumps(TICKETMASTER_BODY)) == {"_embedded": {"events": EVENTS[:3]}}
+
+def test_returns_all_items_below_limit():
+    parser = LimitedItemsParser(None, 10)
+    assert parser.feed(b'[1, 2, 3]') is False
+    assert parser.result() == [1, 2, 3]
+
+@pytest.mark.parametrize("list_key, body", [
+    ("_embedded.events", {"page": {"size": 0, "totalElements": 0}}), # No results: Ticketmaster leaves out "_embedded"
+    ("_embedded.events", {"events": EVENTS}), # List at a different key than expected
+    ("results", {"errorMessage": "Invalid API Key", "results": None}),
+    (None, {"error": "coin not found"}), # Error object instead of a bare list
+    ("prices", {"error": "coin not found"}),
+])
+def test_body_without_the_list_falls_back_to_the_full_body(list_key, body):
+    assert _feed_in_chunks(LimitedItemsParser(list_key, 3), orjson.dumps(body)) == body
+
+def test_empty_list_is_kept():
+    assert _feed_in_chunks(LimitedItemsParser("prices", 3), b'{"prices": [], "market_caps": []}') == {"prices": []}
+
+def test_full_parse_has_the_shape_of_a_streamed_result():
+    # A stream stops before the keys after the list, so a fully parsed body keeps only the list too
+    streamed = _feed_in_chunks(LimitedItemsParser("_embedded.events", 2), orjson.dumps(TICKETMASTER_BODY))
+    assert limit_list(TICKETMASTER_BODY, "_embedded.events", 2) == streamed == {"_embedded": {"events": EVENTS[:2]}}
+
+def test_limit_list_leaves_data_without_the_list_unchanged():
+    data = {"error": "coin not found"}
+    assert limit_list(data, "prices", 2) is data
+    assert limit_list([1, 2, 3], None, 2) == [1, 2]
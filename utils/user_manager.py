@@ -470,6 +470,22 @@ def get_current_user() -> Dict[str, Any]:
             return user
     return {}
 
+def get_session_user() -> Dict[str, Any]:
+    """
+    Get current user like get_current_user(), but look it up only once per login.
+    The result is cached in session state together with the token it was resolved from,
+    so a logout or login (which changes the token) invalidates it automatically.
+    """
+    if not hasattr(st, 'session_state'):
+        return get_current_user()
+    token = st.session_state.get('user_token')
+    cached = st.session_state.get('_session_user')
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    user = get_current_user()
+    st.session_state['_session_user'] = (token, user)
+    return user
+
 def set_current_user(token: str) -> None:
     """Set current user in Streamlit session state."""
     if hasattr(st, 'session_state'):
@@ -506,6 +522,23 @@ def get_user_tier_capability(user_token: Optional[str], capability_key: str, def
     # Path example: 'tiers.pro.web_search_limit_chars'
     return config_manager.get(f'tiers.{user_tier}.{capability_key}', default_value)
 
+def get_session_capability(user_token: Optional[str], capability_key: str, default_value: Any = None) -> Any:
+    """
+    Get a tier capability like get_user_tier_capability(), but resolve each key only once per session.
+    Resolved values are cached in session state together with the token they belong to, so a
+    different user (e.g. after logout and login) starts with a fresh set.
+    """
+    if not hasattr(st, 'session_state'):
+        return get_user_tier_capability(user_token, capability_key, default_value)
+    cached = st.session_state.get('_session_caps')
+    if cached is None or cached[0] != user_token:
+        cached = (user_token, {})
+        st.session_state['_session_caps'] = cached
+    caps = cached[1]
+    if capability_key not in caps:
+        caps[capability_key] = get_user_tier_capability(user_token, capability_key, default_value)
+    return caps[capability_key]
+
 
 # Self-contained test (if executed directly)
 if __name__ == "__main__":